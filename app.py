@@ -2,15 +2,19 @@
 카드 명세서 분석 프로그램
 Flask 메인 애플리케이션 (로그인 시스템 포함)
 """
+import hashlib
 import os
 import secrets
-from datetime import datetime
+from datetime import date, datetime
+from functools import wraps
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, redirect, url_for, g
+from flask import Flask, render_template, request, jsonify, redirect, url_for, g, make_response
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 import database as db
+import import_jobs
 import parser as excel_parser
-from auth import User, init_auth_db, set_auth_db_path, get_user_db_path
+from auth import User, init_auth_db, set_auth_db_path, get_user_db_path, get_user_cache_stats
+from cache import LRUCache
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB
@@ -36,13 +40,77 @@ def load_user(user_id):
 
 @app.before_request
 def before_request():
-    """요청 전 사용자별 DB 경로 설정"""
+    """요청 전 사용자별 DB 경로 설정 (요청 컨텍스트에만 적용)"""
     if current_user.is_authenticated:
         user_db_path = get_user_db_path(str(BASE_PATH), current_user.id)
-        db.DB_PATH = user_db_path
-        # 테이블 초기화 확인
-        if not os.path.exists(user_db_path):
-            db.init_db()
+        g.db_path_token = db.set_db_path(user_db_path)
+        # 테이블 초기화 확인 (프로세스당 한 번)
+        db.ensure_db(user_db_path)
+
+
+@app.after_request
+def after_request(response):
+    """요청별 DB 연결 사용 통계를 응답 헤더로 노출"""
+    stats = db.get_request_stats()
+    if stats:
+        response.headers['X-DB-Connections'] = (
+            f"hits={stats['hits']}; misses={stats['misses']}; opens={stats['opens']}"
+        )
+    return response
+
+
+@app.teardown_appcontext
+def teardown_db(exception):
+    """요청 종료 시 요청 단위 DB 연결을 풀에 반환하고 DB 경로 복원"""
+    db.release_request_connections()
+    token = g.pop('db_path_token', None)
+    if token is not None:
+        db.reset_db_path(token)
+
+
+# ============ 응답 캐시 (ETag) ============
+
+# 렌더링된 응답 본문 캐시 (ETag -> (본문, mimetype))
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '128'))
+_response_cache = LRUCache(RESPONSE_CACHE_SIZE)
+
+
+def _response_etag():
+    """사용자 DB + 데이터 버전 + 경로/쿼리 인자 + 오늘 날짜(기본 기간이 오늘 기준)로 ETag 생성"""
+    key = '|'.join([
+        db.get_db_path(),
+        str(db.get_data_version()),
+        request.path,
+        repr(sorted(request.args.items(multi=True))),
+        date.today().isoformat(),
+    ])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def cached_view(view):
+    """GET 응답에 ETag를 붙이고 If-None-Match가 같으면 304 반환 (렌더링 결과도 같은 키로 캐시)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET':
+            return view(*args, **kwargs)
+        
+        etag = _response_etag()
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            cached = _response_cache.get(etag)
+            if cached is not None:
+                body, mimetype = cached
+                response = app.response_class(body, mimetype=mimetype)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                _response_cache.put(etag, (response.get_data(), response.mimetype))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
 
 
 # ============ 인증 라우트 ============
@@ -73,8 +141,7 @@ def login():
                     login_user(user)
                     # 새 사용자 DB 초기화
                     user_db_path = get_user_db_path(str(BASE_PATH), user_id)
-                    db.DB_PATH = user_db_path
-                    db.init_db()
+                    db.ensure_db(user_db_path)
                     return redirect(url_for('index'))
                 else:
                     error = '이미 존재하는 사용자명입니다'
@@ -103,6 +170,7 @@ def logout():
 
 @app.route('/')
 @login_required
+@cached_view
 def index():
     """대시보드 - 기간 선택 지원"""
     now = datetime.now()
@@ -114,7 +182,7 @@ def index():
     
     summary = db.get_summary_by_date_range(start_year, start_month, end_year, end_month)
     total = sum(s['total'] or 0 for s in summary)
-    recent_txs = db.get_transactions_by_date_range(start_year, start_month, end_year, end_month)[:10]
+    recent_txs = db.get_recent_transactions(start_year, start_month, end_year, end_month, limit=10)
     categories = db.get_categories()
     years = list(range(2025, now.year + 1))
     
@@ -134,58 +202,106 @@ def index():
 
 # ============ 거래 내역 ============
 
-@app.route('/transactions')
-@login_required
-def transactions():
-    """거래 내역 페이지"""
-    year = request.args.get('year', type=int)
-    month = request.args.get('month', type=int)
-    category_id = request.args.get('category', type=int)
-    tag_id = request.args.get('tag', type=int)
-    search = request.args.get('search', '')
-    
+def _transaction_filters():
+    """요청 인자에서 거래 조회 필터 생성"""
     filters = {}
-    if year:
-        filters['year'] = year
-    if month:
-        filters['month'] = month
-    if category_id:
-        filters['category_id'] = category_id
-    if tag_id:
-        filters['tag_id'] = tag_id
+    for key, arg in (('year', 'year'), ('month', 'month'), ('category_id', 'category'), ('tag_id', 'tag')):
+        value = request.args.get(arg, type=int)
+        if value:
+            filters[key] = value
+    search = request.args.get('search', '')
     if search:
         filters['search'] = search
+        filters['sort'] = request.args.get('sort', '')
+    return filters
+
+
+@app.route('/transactions')
+@login_required
+def transactions():
+    """거래 내역 페이지 (목록은 /api/transactions로 스크롤 시 이어서 로드)"""
+    filters = _transaction_filters()
     
-    txs = db.get_transactions(filters if filters else None)
+    first_page, next_cursor = db.get_transactions_page(filters)
+    summary = db.get_transactions_summary(filters)
     categories = db.get_categories()
     tags = db.get_tags()
-    
-    all_txs = db.get_transactions()
-    years = sorted(set(int(t['date'][:4]) for t in all_txs if t['date']), reverse=True)
-    
-    # 전체 금액 합계
-    total_amount = sum(tx['billed_amount'] or 0 for tx in txs)
+    years = db.get_available_years()
     
     return render_template('transactions.html',
-        transactions=txs,
+        transactions=first_page,
+        next_cursor=next_cursor,
+        tx_count=summary['count'],
         categories=categories,
         tags=tags,
         years=years,
-        current_year=year,
-        current_month=month,
-        current_category=category_id,
-        current_tag=tag_id,
-        search=search,
-        total_amount=total_amount
+        current_year=filters.get('year'),
+        current_month=filters.get('month'),
+        current_category=filters.get('category_id'),
+        current_tag=filters.get('tag_id'),
+        search=filters.get('search', ''),
+        sort=filters.get('sort', ''),
+        total_amount=summary['total']
     )
 
 
+@app.route('/api/transactions')
+@login_required
+def api_transactions():
+    """거래 내역 페이지 API (cursor 기반)"""
+    filters = _transaction_filters()
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit', db.TRANSACTIONS_PAGE_SIZE, type=int)
+    
+    try:
+        txs, next_cursor = db.get_transactions_page(filters, cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'transactions': txs, 'next_cursor': next_cursor})
+
+
 # ============ 파일 업로드 ============
 
+# 업로드 파일을 읽어 저장하는 단위 (바이트)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _save_upload(file):
+    """업로드 파일을 읽으면서 SHA-256을 계산해 <내용 해시><확장자> 이름으로 저장
+    
+    같은 내용의 파일은 파일명과 상관없이 한 파일로 저장됨. Returns: (해시, 저장 경로)
+    """
+    upload_folder = app.config['UPLOAD_FOLDER']
+    tmp_path = upload_folder / f".{secrets.token_hex(8)}.upload"
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                f.write(chunk)
+        sha256 = digest.hexdigest()
+        file_path = upload_folder / f"{sha256}{Path(file.filename).suffix.lower()}"
+        os.replace(tmp_path, file_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return sha256, file_path
+
+
+def _unsupported_files(files):
+    """지원하지 않는 형식의 업로드 파일명 목록"""
+    return [file.filename for file in files
+            if Path(file.filename).suffix.lower() not in excel_parser.SUPPORTED_SUFFIXES]
+
+
 @app.route('/upload', methods=['GET', 'POST'])
 @login_required
 def upload():
-    """파일 업로드"""
+    """파일 업로드 - 파싱/저장은 백그라운드 작업으로 실행하고 작업 ID 반환
+    
+    이미 가져온 파일(내용 해시 기준)은 바로 반환. force=1이면 다시 가져옴 (파싱 결과 캐시 사용)
+    """
     if request.method == 'POST':
         if 'file' not in request.files:
             return jsonify({'error': '파일이 없습니다'}), 400
@@ -193,23 +309,103 @@ def upload():
         file = request.files['file']
         if file.filename == '':
             return jsonify({'error': '파일이 선택되지 않았습니다'}), 400
+        if _unsupported_files([file]):
+            return jsonify({'error': f'지원하지 않는 파일 형식: {Path(file.filename).suffix}'}), 400
         
         filename = file.filename
-        file_path = app.config['UPLOAD_FOLDER'] / filename
-        file.save(file_path)
+        sha256, file_path = _save_upload(file)
         
-        try:
-            count = excel_parser.import_file(file_path)
+        previous = db.get_import(sha256)
+        if previous and request.form.get('force') != '1':
             return jsonify({
                 'success': True,
-                'message': f'{count}건의 거래가 추가되었습니다'
+                'duplicate': True,
+                'message': f"이미 가져온 파일입니다 ({previous['filename']}, {previous['imported_at']})",
             })
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+        
+        def run(progress):
+            count = excel_parser.import_file(file_path, progress=progress, sha256=sha256)
+            db.record_import(sha256, filename)
+            return count
+        
+        job = import_jobs.submit(
+            current_user.id, db.get_db_path(), [filename], run,
+            lambda count: f'{count}건의 거래가 추가되었습니다',
+        )
+        return _import_job_response(job)
     
     return render_template('upload.html')
 
 
+@app.route('/upload/multiple', methods=['POST'])
+@login_required
+def upload_multiple():
+    """여러 파일 업로드 - 시트/파일을 병렬 파싱해 한 번에 저장 (백그라운드 작업)
+    
+    이미 가져온 파일과 같은 요청 안의 중복 파일은 제외. force=1이면 이미 가져온 파일도 다시 가져옴
+    """
+    files = [file for file in request.files.getlist('files') if file.filename]
+    if not files:
+        return jsonify({'error': '파일이 선택되지 않았습니다'}), 400
+    unsupported = _unsupported_files(files)
+    if unsupported:
+        return jsonify({'error': f"지원하지 않는 파일 형식: {', '.join(unsupported)}"}), 400
+    
+    force = request.form.get('force') == '1'
+    uploads = {}  # 해시 -> (파일명, 저장 경로)
+    skipped = 0
+    for file in files:
+        sha256, file_path = _save_upload(file)
+        if sha256 in uploads or (not force and db.get_import(sha256)):
+            skipped += 1
+            continue
+        uploads[sha256] = (file.filename, file_path)
+    
+    if not uploads:
+        return jsonify({
+            'success': True,
+            'duplicate': True,
+            'message': f'{skipped}개 파일 모두 이미 가져온 파일입니다',
+        })
+    
+    hashes = list(uploads)
+    filenames = [uploads[sha256][0] for sha256 in hashes]
+    file_paths = [uploads[sha256][1] for sha256 in hashes]
+    
+    def run(progress):
+        count = excel_parser.import_files(file_paths, progress=progress, hashes=hashes)
+        for sha256, filename in zip(hashes, filenames):
+            db.record_import(sha256, filename)
+        return count
+    
+    skipped_note = f' (중복 {skipped}개 제외)' if skipped else ''
+    job = import_jobs.submit(
+        current_user.id, db.get_db_path(), filenames, run,
+        lambda count: f'{len(file_paths)}개 파일에서 {count}건의 거래가 추가되었습니다{skipped_note}',
+    )
+    return _import_job_response(job)
+
+
+def _import_job_response(job):
+    """작업 등록 응답 (202 + 진행 상황 조회 URL)"""
+    status_url = url_for('get_import_job', job_id=job.id)
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': status_url,
+    }), 202, {'Location': status_url}
+
+
+@app.route('/api/imports/<job_id>')
+@login_required
+def get_import_job(job_id):
+    """import 작업 진행 상황 (단계, 파싱/저장 건수, 오류)"""
+    job = import_jobs.get_job(job_id, current_user.id)
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다'}), 404
+    return jsonify(job.to_dict())
+
+
 # ============ 카테고리 API ============
 
 @app.route('/categories')
@@ -228,6 +424,7 @@ def categories_page():
 
 @app.route('/api/categories', methods=['GET', 'POST'])
 @login_required
+@cached_view
 def api_categories():
     """카테고리 API"""
     if request.method == 'POST':
@@ -350,10 +547,9 @@ def bulk_update_category():
     if not transaction_ids:
         return jsonify({'error': '거래를 선택하세요'}), 400
     
-    for tx_id in transaction_ids:
-        db.update_transaction_category(tx_id, category_id)
+    count = db.bulk_update_transaction_category(transaction_ids, category_id)
     
-    return jsonify({'success': True, 'count': len(transaction_ids)})
+    return jsonify({'success': True, 'count': count})
 
 
 @app.route('/api/transactions/bulk', methods=['DELETE'])
@@ -366,16 +562,41 @@ def bulk_delete_transactions():
     if not transaction_ids:
         return jsonify({'error': '거래를 선택하세요'}), 400
     
-    for tx_id in transaction_ids:
-        db.delete_transaction(tx_id)
+    count = db.bulk_delete_transactions(transaction_ids)
+    
+    return jsonify({'success': True, 'count': count})
+
+
+@app.route('/api/transactions/bulk/tags', methods=['POST', 'DELETE'])
+@login_required
+def bulk_manage_tags():
+    """일괄 태그 추가/제거"""
+    data = request.get_json()
+    transaction_ids = data.get('transaction_ids', [])
+    
+    if not transaction_ids:
+        return jsonify({'error': '거래를 선택하세요'}), 400
+    
+    if request.method == 'POST':
+        tag_name = data.get('name', '').strip()
+        if not tag_name:
+            return jsonify({'error': '태그 이름을 입력하세요'}), 400
+        tag_id = db.create_tag(tag_name)
+        count = db.bulk_add_tag(transaction_ids, tag_id)
+        return jsonify({'success': True, 'tag_id': tag_id, 'count': count})
     
-    return jsonify({'success': True, 'count': len(transaction_ids)})
+    tag_id = data.get('tag_id')
+    if not tag_id:
+        return jsonify({'error': '태그를 선택하세요'}), 400
+    count = db.bulk_remove_tag(transaction_ids, tag_id)
+    return jsonify({'success': True, 'count': count})
 
 
 # ============ 태그 API ============
 
 @app.route('/api/tags')
 @login_required
+@cached_view
 def api_tags():
     """모든 태그 조회"""
     return jsonify(db.get_tags())
@@ -390,91 +611,88 @@ def api_tags_autocomplete():
     return jsonify(tags)
 
 
+# ============ 캐시 통계 ============
+
+@app.route('/api/stats/cache')
+@login_required
+def api_cache_stats():
+    """프로세스 내 캐시 적중 통계"""
+    return jsonify({
+        'queries': db.get_query_cache_stats(),
+        'responses': _response_cache.get_stats(),
+        'users': get_user_cache_stats(),
+    })
+
+
 # ============ 리포트 ============
 
+# 리포트 기간 선택지 (최근 N개월)
+REPORT_PERIOD_MONTHS = (1, 3, 6, 12)
+
+
+def _period_label(start, end):
+    """(연, 월) 기간을 '2025년 3월~5월' 형태로 표시"""
+    (start_year, start_month), (end_year, end_month) = start, end
+    if start == end:
+        return f"{end_year}년 {end_month}월"
+    if start_year == end_year:
+        return f"{start_year}년 {start_month}월~{end_month}월"
+    return f"{start_year}년 {start_month}월~{end_year}년 {end_month}월"
+
+
 @app.route('/reports')
 @login_required
+@cached_view
 def reports():
     """분석 리포트 페이지"""
     now = datetime.now()
     year = request.args.get('year', now.year, type=int)
     month = request.args.get('month', now.month, type=int)
-    
-    # 이번달 카테고리별 요약
-    current_summary = db.get_monthly_summary(year, month)
-    current_total = sum(s['total'] or 0 for s in current_summary)
-    
-    # 전달 계산
-    if month == 1:
-        prev_year, prev_month = year - 1, 12
-    else:
-        prev_year, prev_month = year, month - 1
-    
-    # 전달 카테고리별 요약
-    prev_summary = db.get_monthly_summary(prev_year, prev_month)
-    prev_total = sum(s['total'] or 0 for s in prev_summary)
-    
-    # 비교 데이터 생성
-    comparison_data = []
-    all_categories = {}
-    
-    for s in current_summary:
-        cat_id = s['id']
-        all_categories[cat_id] = {
-            'id': cat_id,
-            'name': s['name'] or '미분류',
-            'color': s['color'] or '#64748b',
-            'current': s['total'] or 0,
-            'prev': 0
-        }
-    
-    for s in prev_summary:
-        cat_id = s['id']
-        if cat_id in all_categories:
-            all_categories[cat_id]['prev'] = s['total'] or 0
-        else:
-            all_categories[cat_id] = {
-                'id': cat_id,
-                'name': s['name'] or '미분류',
-                'color': s['color'] or '#64748b',
-                'current': 0,
-                'prev': s['total'] or 0
-            }
-    
-    comparison_data = list(all_categories.values())
-    comparison_data.sort(key=lambda x: x['current'], reverse=True)
-    
-    # 총 지출 비교
-    total_diff = current_total - prev_total
-    total_diff_percent = ((current_total - prev_total) / prev_total * 100) if prev_total > 0 else 0
-    
-    # 연간 월별 추이
-    yearly = db.get_yearly_summary(year)
+    compare = request.args.get('compare', 'prev')
+    months = request.args.get('months', 1, type=int)
+    if compare not in db.REPORT_COMPARE_MODES:
+        compare = 'prev'
+    if months not in REPORT_PERIOD_MONTHS:
+        months = 1
+    
+    report = db.get_report(year, month, compare=compare, months=months)
+    
+    # 현재 기간 카테고리별 요약 (거래가 있는 카테고리만)
+    category_summary = [
+        {'id': item['id'], 'name': item['name'], 'color': item['color'],
+         'count': item['count'], 'total': item['current']}
+        for item in report['categories'] if item['count']
+    ]
     
     # 연도 목록
-    all_txs = db.get_transactions()
-    years = sorted(set(int(t['date'][:4]) for t in all_txs if t['date']), reverse=True)
+    years = db.get_available_years()
     if not years:
         years = [now.year]
     
     return render_template('reports.html',
         year=year,
         month=month,
-        prev_year=prev_year,
-        prev_month=prev_month,
-        category_summary=current_summary,
-        comparison_data=comparison_data,
-        current_total=current_total,
-        prev_total=prev_total,
-        total_diff=total_diff,
-        total_diff_percent=total_diff_percent,
-        yearly=yearly,
+        compare=compare,
+        months=months,
+        period_options=REPORT_PERIOD_MONTHS,
+        current_name='이번달' if months == 1 else '현재 기간',
+        compare_name='전년 동기' if compare == 'yoy' else ('전달' if months == 1 else '이전 기간'),
+        current_label=_period_label(*report['current_period']),
+        compare_label=_period_label(*report['compare_period']),
+        category_summary=category_summary,
+        comparison_data=report['categories'],
+        current_total=report['current_total'],
+        prev_total=report['prev_total'],
+        total_diff=report['total_diff'],
+        total_diff_percent=report['total_diff_percent'],
+        yearly=report['trend'],
         years=years
     )
 
 
 @app.route('/api/reports/monthly')
 @login_required
+@cached_view
 def api_monthly_report():
     """월별 리포트 API"""
     year = request.args.get('year', datetime.now().year, type=int)
@@ -486,6 +704,7 @@ def api_monthly_report():
 
 @app.route('/api/reports/yearly')
 @login_required
+@cached_view
 def api_yearly_report():
     """연간 리포트 API"""
     year = request.args.get('year', datetime.now().year, type=int)
@@ -496,6 +715,7 @@ def api_yearly_report():
 
 if __name__ == '__main__':
     db.init_db()
+    db.migrate_user_dbs(BASE_PATH)
     
     print("=" * 50)
     print("카드 명세서 분석 프로그램")
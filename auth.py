@@ -7,16 +7,25 @@ import os
 from pathlib import Path
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import LoginManager, UserMixin
+from cache import LRUCache
 
 
 # 사용자 데이터베이스 경로
 AUTH_DB_PATH = None
 
+# 사용자 캐시 설정 (최대 개수 / 유효 시간(초))
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '256'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '300'))
+# ID별 User 객체 - 지금은 계정을 수정/삭제하는 경로가 없어 무효화 없이 USER_CACHE_TTL이 지나면 다시 조회
+# (계정 정보를 바꾸는 기능을 추가하면 그 경로에서 _user_cache.invalidate(user_id) 호출)
+_user_cache = LRUCache(USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
 
 def set_auth_db_path(base_path):
     """인증 DB 경로 설정"""
     global AUTH_DB_PATH
     AUTH_DB_PATH = os.path.join(base_path, 'users.db')
+    _user_cache.clear()
 
 
 def get_auth_connection():
@@ -53,7 +62,11 @@ class User(UserMixin):
     
     @staticmethod
     def get(user_id):
-        """ID로 사용자 조회"""
+        """ID로 사용자 조회 (캐시 우선)"""
+        user = _user_cache.get(user_id)
+        if user is not None:
+            return user
+        
         conn = get_auth_connection()
         row = conn.execute(
             "SELECT id, username FROM users WHERE id = ?",
@@ -62,7 +75,9 @@ class User(UserMixin):
         conn.close()
         
         if row:
-            return User(row['id'], row['username'])
+            user = User(row['id'], row['username'])
+            _user_cache.put(user.id, user)
+            return user
         return None
     
     @staticmethod
@@ -102,6 +117,11 @@ class User(UserMixin):
         return check_password_hash(stored_hash, password)
 
 
+def get_user_cache_stats():
+    """사용자 캐시 누적 통계"""
+    return _user_cache.get_stats()
+
+
 def get_user_db_path(base_path, user_id):
     """사용자별 데이터베이스 경로 반환"""
     return os.path.join(base_path, f'data_{user_id}.db')
@@ -0,0 +1,707 @@
+"""
+성능 측정 스크립트
+임시 DB에 가짜 거래 데이터를 만들어 주요 경로의 쿼리 수/소요 시간 측정
+
+사용법: python benchmark.py <항목> [옵션]
+"""
+import argparse
+import http.cookiejar
+import json
+import random
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import database as db
+
+MERCHANTS = ['쿠팡', '스타벅스 강남점', 'GS25 역삼점', 'HIGGSFIELD INC.', '배달의민족',
+             '카카오T', 'SK텔레콤', 'MIDJOURNEY INC.', '이마트', 'FC* FREEPIK PREMIUM+']
+
+
+def make_transactions(count, seed=0):
+    """가짜 거래 데이터 생성"""
+    rng = random.Random(seed)
+    transactions = []
+    for _ in range(count):
+        amount = rng.randint(1, 500) * 100
+        transactions.append({
+            'date': f"{rng.randint(2023, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}",
+            'merchant': rng.choice(MERCHANTS),
+            'business_type': '기타',
+            'currency': 'KRW',
+            'krw_amount': amount,
+            'billed_amount': amount,
+            'is_overseas': 0,
+        })
+    return transactions
+
+
+def use_temp_db(tmp_dir, name):
+    """임시 DB 생성 후 DB_PATH 전환"""
+    db.DB_PATH = Path(tmp_dir) / f"{name}.db"
+    db.init_db()
+
+
+def seed(transactions, tag_every=3):
+    """거래 데이터 저장 (일부 거래에 태그 부여)"""
+    tag_ids = [db.create_tag(name) for name in ('여행', '업무', '경조사')]
+    for i, tx in enumerate(transactions):
+        tx_id = db.add_transaction(tx)
+        if i % tag_every == 0:
+            db.add_tag_to_transaction(tx_id, tag_ids[i % len(tag_ids)])
+
+
+class QueryCounter:
+    """풀링된 연결에 trace 콜백을 걸어 실행된 SQL 문 수 집계"""
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        conn = db.get_connection()
+        conn.set_trace_callback(self._trace)
+        conn.close()  # 같은 연결이 풀에 반환되어 다음 조회에서 재사용됨
+        return self
+
+    def __exit__(self, *exc):
+        conn = db.get_connection()
+        conn.set_trace_callback(None)
+        conn.close()
+
+    def _trace(self, statement):
+        self.count += 1
+
+
+def bench_tags(sizes):
+    """거래 목록 조회 시 거래 수에 따른 쿼리 수 (태그 N+1 여부 확인)"""
+    print(f"{'rows':>8} {'queries':>8} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            use_temp_db(tmp_dir, f"tags_{size}")
+            seed(make_transactions(size))
+            with QueryCounter() as counter:
+                start = time.perf_counter()
+                txs = db.get_transactions()
+                elapsed = time.perf_counter() - start
+            assert len(txs) == size
+            print(f"{size:>8} {counter.count:>8} {elapsed:>8.3f}")
+        db._pool.close_all()
+
+
+def bench_import(size):
+    """파일 import 저장 단계 처리량 - 행 단위 커밋 vs 일괄 트랜잭션"""
+    transactions = make_transactions(size)
+    months = {(int(tx['date'][:4]), int(tx['date'][4:6])) for tx in transactions}
+    
+    def per_row():
+        for year, month in months:
+            db.delete_transactions_by_month(year, month)
+        for tx in transactions:
+            db.add_transaction(tx)
+    
+    def bulk():
+        db.replace_transactions_by_month(transactions)
+    
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, run in (('per-row', per_row), ('bulk', bulk)):
+            use_temp_db(tmp_dir, f"import_{name}")
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            assert len(db.get_transactions()) == size
+            results.append((name, elapsed))
+        db._pool.close_all()
+    
+    print(f"{'mode':>8} {'rows':>8} {'seconds':>8} {'rows/sec':>10}")
+    for name, elapsed in results:
+        print(f"{name:>8} {size:>8} {elapsed:>8.3f} {size / elapsed:>10.0f}")
+
+
+def make_sheets(rows, seed=0):
+    """명세서 형식 시트 DataFrame 목록 [(시트 이름, 유형, DataFrame)] 생성 (pd.read_excel(header=None) 형태)
+    
+    일시불: 업종이 빈 행과 취소(음수) 거래 포함. 할부: 이용금액과 원금 열이 따로 있음.
+    해외이용: sheet_data.txt와 같은 12열 레이아웃 (빈 행 뒤 헤더, 마지막 합계 행).
+    """
+    import pandas as pd
+    
+    rng = random.Random(seed)
+    lump_sum = [['일시불', None, None, None, None],
+                ['이용일', '이용카드', '가맹점', '이용금액', '업종']]
+    installment = [['할부 이용내역', None, None, None, None, None, None],
+                   ['이용일', '가맹점', '업종', '할부개월', '이용금액', '원금', '이자']]
+    overseas = [['해외이용'] + [None] * 11,
+                [None] * 12,
+                ['이용일', '접수일', '가맹점', '업종', '국가', '현지이용금액', '화폐단위', '접수금액(US$)',
+                 '환율', '원화환산', '해외사용 수수료 (0.2%)', '청구금액']]
+    for i, tx in enumerate(make_transactions(rows, seed)):
+        amount = tx['billed_amount']
+        business_type = None if i % 4 == 0 else rng.choice(['온라인', '소프트웨어', ' 일반음식점 '])
+        sign = '-' if i % 7 == 0 else ''
+        lump_sum.append([tx['date'], '본인 933', tx['merchant'], f"{sign}{amount:,}", business_type])
+        months = rng.choice([2, 3, 6, 12])
+        installment.append([tx['date'], tx['merchant'], business_type, f"{months}개월",
+                            f"{amount * months:,}", f"{amount:,}", f"{amount // 100:,}"])
+        usd = amount / 1400
+        overseas.append([tx['date'], tx['date'], tx['merchant'], business_type, '미국',
+                         f"{usd:,.2f}", 'USD', f"{usd * 1.01:,.2f}", '1,471.10',
+                         f"{amount:,}", f"{amount // 500:,}", f"{amount + amount // 500:,}"])
+    lump_sum.append([None, None, '합계', '0', None])
+    installment.append([None, '합계', None, None, '0', '0', '0'])
+    overseas.append([None, None, '해외매출합계'] + [None] * 9)
+    return [('일시불', 'domestic', pd.DataFrame(lump_sum)),
+            ('할부', 'domestic', pd.DataFrame(installment)),
+            ('해외이용', 'overseas', pd.DataFrame(overseas))]
+
+
+# ============ 기존 행 단위 파서 (비교 기준) ============
+# 열 단위 변환 이전 parser.py의 시트 파싱 코드 그대로 (자동 카테고리 조회만 제외 - 지금은 저장할 때 지정)
+
+def legacy_find_header_row(df, keywords):
+    """헤더 행 찾기"""
+    import pandas as pd
+    for i in range(min(20, len(df))):
+        row_text = ' '.join([str(x) for x in df.iloc[i].tolist() if pd.notna(x)])
+        if any(kw in row_text for kw in keywords):
+            return i
+    return None
+
+
+def legacy_is_installment_sheet(df):
+    """할부 시트인지 확인"""
+    import pandas as pd
+    for i in range(min(5, len(df))):
+        row_text = ' '.join([str(x) for x in df.iloc[i].tolist() if pd.notna(x)])
+        if '할부' in row_text:
+            return True
+    return False
+
+
+def legacy_parse_overseas_sheet(df):
+    """해외이용 시트 파싱"""
+    import pandas as pd
+    from parser import clean_amount, parse_date
+    transactions = []
+    
+    header_row = legacy_find_header_row(df, ['이용일', '가맹점', '접수일'])
+    if header_row is None:
+        return transactions
+    
+    headers = df.iloc[header_row].tolist()
+    col_map = {}
+    for idx, h in enumerate(headers):
+        h_str = str(h).strip() if pd.notna(h) else ''
+        if '이용일' in h_str:
+            col_map['date'] = idx
+        elif '접수일' in h_str:
+            col_map['receipt_date'] = idx
+        elif '가맹점' in h_str:
+            col_map['merchant'] = idx
+        elif '업종' in h_str:
+            col_map['business_type'] = idx
+        elif '국가' in h_str:
+            col_map['country'] = idx
+        elif '현지' in h_str and '금액' in h_str:
+            col_map['local_amount'] = idx
+        elif '화폐' in h_str or 'USD' in h_str.upper():
+            col_map['currency'] = idx
+        elif '접수금액' in h_str or 'US$' in h_str:
+            col_map['usd_amount'] = idx
+        elif '환율' in h_str:
+            col_map['exchange_rate'] = idx
+        elif '원화' in h_str:
+            col_map['krw_amount'] = idx
+        elif '수수료' in h_str:
+            col_map['fee'] = idx
+        elif '청구금액' in h_str or '청구' in h_str:
+            col_map['billed_amount'] = idx
+    
+    for i in range(header_row + 1, len(df)):
+        row = df.iloc[i].tolist()
+        
+        date_val = row[col_map.get('date', 0)] if 'date' in col_map else None
+        if pd.isna(date_val) or not parse_date(date_val):
+            continue
+        
+        tx = {
+            'date': parse_date(row[col_map.get('date', 0)]),
+            'receipt_date': parse_date(row[col_map.get('receipt_date', 1)]),
+            'merchant': str(row[col_map.get('merchant', 2)]).strip() if pd.notna(row[col_map.get('merchant', 2)]) else '',
+            'business_type': str(row[col_map.get('business_type', 3)]).strip() if 'business_type' in col_map and pd.notna(row[col_map['business_type']]) else None,
+            'country': str(row[col_map.get('country', 4)]).strip() if 'country' in col_map and pd.notna(row[col_map['country']]) else None,
+            'local_amount': clean_amount(row[col_map['local_amount']]) if 'local_amount' in col_map else None,
+            'currency': str(row[col_map['currency']]).strip() if 'currency' in col_map and pd.notna(row[col_map['currency']]) else 'USD',
+            'usd_amount': clean_amount(row[col_map['usd_amount']]) if 'usd_amount' in col_map else None,
+            'exchange_rate': clean_amount(row[col_map['exchange_rate']]) if 'exchange_rate' in col_map else None,
+            'krw_amount': int(clean_amount(row[col_map['krw_amount']])) if 'krw_amount' in col_map else 0,
+            'fee': int(clean_amount(row[col_map['fee']])) if 'fee' in col_map else 0,
+            'billed_amount': 0,
+            'is_overseas': 1,
+            'category_id': None,
+        }
+        tx['billed_amount'] = tx['krw_amount']
+        
+        if tx['merchant'] and tx['billed_amount'] > 0:
+            transactions.append(tx)
+    
+    return transactions
+
+
+def legacy_parse_domestic_sheet(df, sheet_name=''):
+    """국내이용/일시불/할부 시트 파싱"""
+    import pandas as pd
+    from parser import clean_amount, parse_date
+    transactions = []
+    is_halbu = legacy_is_installment_sheet(df) or '할부' in sheet_name
+    
+    header_row = legacy_find_header_row(df, ['이용일', '가맹점', '이용금액', '원금'])
+    if header_row is None:
+        return transactions
+    
+    headers = df.iloc[header_row].tolist()
+    col_map = {}
+    for idx, h in enumerate(headers):
+        h_str = str(h).strip() if pd.notna(h) else ''
+        if '이용일' in h_str and 'date' not in col_map:
+            col_map['date'] = idx
+        elif '가맹점' in h_str and 'merchant' not in col_map:
+            col_map['merchant'] = idx
+        elif '업종' in h_str and 'business_type' not in col_map:
+            col_map['business_type'] = idx
+        elif h_str == '원금':
+            col_map['principal'] = idx
+        elif '이용금액' in h_str and 'amount' not in col_map:
+            col_map['amount'] = idx
+        elif '할부' in h_str and '개월' in h_str:
+            col_map['installment'] = idx
+    
+    for i in range(header_row + 1, len(df)):
+        row = df.iloc[i].tolist()
+        
+        date_val = row[col_map.get('date', 0)] if 'date' in col_map else None
+        if pd.isna(date_val) or not parse_date(date_val):
+            continue
+        
+        if is_halbu and 'principal' in col_map:
+            raw_amount = row[col_map['principal']]
+        elif 'amount' in col_map:
+            raw_amount = row[col_map['amount']]
+        else:
+            raw_amount = 0
+        amount = int(clean_amount(raw_amount))
+        
+        merchant = ''
+        if 'merchant' in col_map and pd.notna(row[col_map['merchant']]):
+            merchant = str(row[col_map['merchant']]).strip()
+        business_type = None
+        if 'business_type' in col_map and pd.notna(row[col_map['business_type']]):
+            business_type = str(row[col_map['business_type']]).strip()
+        
+        tx = {
+            'date': parse_date(date_val),
+            'receipt_date': None,
+            'merchant': merchant,
+            'business_type': business_type,
+            'country': None,
+            'local_amount': None,
+            'currency': 'KRW',
+            'usd_amount': None,
+            'exchange_rate': None,
+            'krw_amount': amount,
+            'fee': 0,
+            'billed_amount': amount,
+            'is_overseas': 0,
+            'category_id': None,
+        }
+        if tx['merchant'] and tx['billed_amount'] != 0:
+            transactions.append(tx)
+    
+    return transactions
+
+
+def bench_parse(rows):
+    """시트 파싱 속도 - 기존 행 단위 파서 vs 열 단위 변환 (결과가 기존 파서와 같은지 확인)"""
+    import contextlib
+    import io
+    import parser
+    
+    def parse_sheet(parse_domestic, parse_overseas, sheet_name, sheet_type, df):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if sheet_type == 'domestic':
+                return parse_domestic(df, sheet_name)
+            return parse_overseas(df)
+    
+    print(f"{'sheet':>10} {'rows':>8} {'legacy':>8} {'vector':>8} {'speedup':>8}")
+    for sheet_name, sheet_type, df in make_sheets(rows):
+        start = time.perf_counter()
+        expected = parse_sheet(legacy_parse_domestic_sheet, legacy_parse_overseas_sheet,
+                               sheet_name, sheet_type, df)
+        legacy_elapsed = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        result = parse_sheet(parser.parse_domestic_sheet, parser.parse_overseas_sheet,
+                             sheet_name, sheet_type, df)
+        vector_elapsed = time.perf_counter() - start
+        
+        assert expected, sheet_name
+        assert result == expected, f"{sheet_name}: 기존 파서와 결과가 다름"
+        print(f"{sheet_name:>10} {rows:>8} {legacy_elapsed:>8.3f} {vector_elapsed:>8.3f} "
+              f"{legacy_elapsed / vector_elapsed:>7.1f}x")
+
+
+def write_statement(path, rows, seed=0):
+    """요약 시트 + 일시불 시트로 된 명세서 xlsx 생성 (openpyxl 쓰기 전용 모드)"""
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    summary = workbook.create_sheet('청구요약')
+    summary.append(['청구요약'])
+    sheet = workbook.create_sheet('일시불')
+    sheet.append(['일시불'])
+    sheet.append(['이용일', '이용카드', '가맹점', '이용금액', '업종'])
+    for tx in make_transactions(rows, seed):
+        sheet.append([tx['date'], '본인 933', tx['merchant'], f"{tx['billed_amount']:,}", '온라인'])
+    workbook.save(path)
+
+
+def bench_stream(sizes):
+    """Excel import 최대 메모리 - 시트 전체 DataFrame vs 스트리밍 묶음"""
+    import contextlib
+    import io
+    import tracemalloc
+    import parser
+    
+    def whole(path):
+        return len(parser.parse_excel_file(path))
+    
+    def stream(path):
+        return sum(len(batch) for batch in parser.iter_excel_batches(path))
+    
+    print(f"{'mode':>8} {'rows':>8} {'seconds':>8} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            path = Path(tmp_dir) / f"statement_{size}.xlsx"
+            write_statement(path, size)
+            for name, run in (('whole', whole), ('stream', stream)):
+                tracemalloc.start()
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    count = run(path)
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                assert count == size
+                print(f"{name:>8} {size:>8} {elapsed:>8.2f} {peak / 2**20:>8.1f}")
+
+
+def bench_csv(rows):
+    """CSV 파싱 처리량/최대 메모리 - pd.read_csv 전체 로드 vs csv 모듈 스트리밍"""
+    import contextlib
+    import csv
+    import io
+    import tracemalloc
+    import pandas as pd
+    import parser
+    
+    def pandas_path(path):
+        df = pd.read_csv(path, header=None, encoding='utf-8')
+        return parser.parse_domestic_sheet(df)
+    
+    def stream_path(path):
+        # import와 같이 묶음을 받는 즉시 넘기고 보관하지 않음
+        return sum(len(batch) for batch in parser.iter_csv_batches(path))
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / 'statement.csv'
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['일시불', '', '', '', ''])  # pd.read_csv는 첫 행보다 열이 많은 행을 거부
+            writer.writerow(['이용일', '이용카드', '가맹점', '이용금액', '업종'])
+            for tx in make_transactions(rows):
+                writer.writerow([tx['date'], '본인 933', tx['merchant'], f"{tx['billed_amount']:,}", '온라인'])
+        
+        results = []
+        for name, run in (('pandas', pandas_path), ('stream', stream_path)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                run(path)
+                elapsed = time.perf_counter() - start
+                
+                tracemalloc.start()
+                run(path)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            results.append((name, elapsed, peak))
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            streamed = [tx for batch in parser.iter_csv_batches(path) for tx in batch]
+            assert streamed == pandas_path(path)
+    
+    print(f"{'mode':>8} {'rows':>8} {'seconds':>8} {'rows/sec':>10} {'peak MB':>8}")
+    for name, elapsed, peak in results:
+        print(f"{name:>8} {rows:>8} {elapsed:>8.3f} {rows / elapsed:>10.0f} {peak / 2**20:>8.1f}")
+
+
+def bench_parallel(files, rows, workers):
+    """여러 명세서 파싱 시간 - 파일 순차 파싱 vs 프로세스 풀"""
+    import contextlib
+    import io
+    import os
+    import parser
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = [Path(tmp_dir) / f"statement_{i:02d}.xlsx" for i in range(files)]
+        for i, path in enumerate(paths):
+            write_statement(path, rows, seed=i)
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            expected = [tx for path in paths for tx in parser.parse_excel_file(path)]
+            sequential = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            result = [tx for txs in parser.parse_files_parallel(paths, workers) for tx in txs]
+            parallel = time.perf_counter() - start
+        
+        assert result == expected
+    
+    print(f"cpu {os.cpu_count()}, {files} files x {rows} rows")
+    print(f"{'mode':>12} {'seconds':>8}")
+    print(f"{'sequential':>12} {sequential:>8.2f}")
+    print(f"{f'workers={workers}':>12} {parallel:>8.2f}")
+
+
+def bench_read_during_import(size, journal_mode):
+    """대량 import 진행 중 리포트 조회 지연 시간 (WAL이면 쓰기 트랜잭션 중에도 읽기 가능)"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        use_temp_db(tmp_dir, f"read_{journal_mode}")
+        db.replace_transactions_by_month(make_transactions(2000, seed=1))
+        if journal_mode != 'wal':
+            db._pool.close_all()
+            original = db._apply_pragmas
+            
+            def legacy_pragmas(conn):
+                conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+                conn.execute("PRAGMA foreign_keys = ON")
+            db._apply_pragmas = legacy_pragmas
+        
+        path = db.get_db_path()
+        transactions = make_transactions(size, seed=2)
+        done = threading.Event()
+        latencies = []
+        failures = []
+        
+        def read_reports():
+            with db.use_db_path(path):
+                while not done.is_set():
+                    start = time.perf_counter()
+                    try:
+                        db.get_yearly_summary(2024)
+                    except Exception as e:  # 잠금 대기 시간 초과
+                        failures.append(e)
+                    latencies.append(time.perf_counter() - start)
+                    time.sleep(0.01)
+        
+        reader = threading.Thread(target=read_reports)
+        reader.start()
+        start = time.perf_counter()
+        db.replace_transactions_by_month(transactions)
+        elapsed = time.perf_counter() - start
+        done.set()
+        reader.join()
+        if journal_mode != 'wal':
+            db._apply_pragmas = original
+        db._pool.close_all()
+    
+    print(f"{'journal':>8} {'rows':>8} {'import_s':>9} {'reads':>6} {'failed':>7} {'max_read_s':>11}")
+    print(f"{journal_mode:>8} {size:>8} {elapsed:>9.3f} {len(latencies):>6} "
+          f"{len(failures):>7} {max(latencies):>11.3f}")
+
+
+def bench_query_cache(rounds):
+    """페이지 조회마다 읽는 카테고리/태그/규칙 조회 - 캐시 사용 전후 소요 시간"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        use_temp_db(tmp_dir, "query_cache")
+        for i in range(30):
+            db.create_tag(f"태그{i}")
+            db.set_merchant_category_rule(f"가맹점{i}", 1 + i % 7)
+        
+        def page_view():
+            db.get_categories()
+            db.get_tags()
+            db.get_merchant_rules()
+        
+        def uncached():
+            db._load_categories()
+            db._load_tags()
+            db._load_merchant_rules()
+        
+        results = []
+        for name, run in (('uncached', uncached), ('cached', page_view)):
+            start = time.perf_counter()
+            for n in range(rounds):
+                run()
+                if n % 100 == 99:
+                    db.create_tag(f"{name}{n}")  # 가끔 쓰기 발생 -> 태그 캐시만 무효화
+            results.append((name, time.perf_counter() - start))
+        
+        assert [t['name'] for t in db.get_tags()] == [t['name'] for t in db._load_tags()]
+        stats = db.get_query_cache_stats()
+        db._pool.close_all()
+    
+    print(f"{'mode':>9} {'rounds':>7} {'seconds':>8}")
+    for name, elapsed in results:
+        print(f"{name:>9} {rounds:>7} {elapsed:>8.3f}")
+    print(f"cache: {stats}")
+
+
+def bench_isolation(users, requests_per_user, workers):
+    """멀티스레드 서버에서 사용자별 DB 격리 확인
+    
+    사용자마다 자기 이름이 붙은 가맹점만 저장해 두고, 여러 사용자의 조회/태그 요청을 동시에 보내
+    다른 사용자의 데이터가 섞여 나오는지 검사.
+    """
+    from werkzeug.serving import make_server
+    import auth
+    import app as flask_app
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        auth.set_auth_db_path(tmp_dir)
+        auth.init_auth_db()
+        flask_app.BASE_PATH = tmp_dir
+        flask_app.app.config['UPLOAD_FOLDER'] = Path(tmp_dir) / 'uploads'
+        
+        server = make_server('127.0.0.1', 0, flask_app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        
+        def opener_for(username):
+            """사용자 가입 후 세션 쿠키를 가진 opener 반환"""
+            opener = urllib.request.build_opener(
+                urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+            )
+            form = urllib.parse.urlencode({
+                'username': username, 'password': 'password', 'action': 'register'
+            }).encode()
+            opener.open(f"{base_url}/login", form).read()
+            return opener
+        
+        def call(opener, method, path, body=None):
+            data = json.dumps(body).encode() if body is not None else None
+            req = urllib.request.Request(
+                f"{base_url}{path}", data=data, method=method,
+                headers={'Content-Type': 'application/json'}
+            )
+            with opener.open(req) as res:
+                return json.loads(res.read())
+        
+        sessions = []
+        for i in range(users):
+            name = f"user{i}"
+            opener = opener_for(name)
+            user_id = auth.User.get_by_username(name)['id']
+            with db.use_db_path(auth.get_user_db_path(tmp_dir, user_id)):
+                transactions = make_transactions(50, seed=i)
+                for tx in transactions:
+                    tx['merchant'] = f"{name} 가맹점"
+                db.replace_transactions_by_month(transactions)
+            sessions.append((name, opener))
+        
+        def worker(name, opener):
+            """조회와 태그 추가를 섞어 보내고 다른 사용자의 데이터가 보이면 기록"""
+            violations = calls = 0
+            for n in range(requests_per_user):
+                if n % 3 == 0:
+                    page = call(opener, 'GET', '/api/transactions?limit=20')
+                    ids = [tx['id'] for tx in page['transactions']]
+                    call(opener, 'POST', '/api/transactions/bulk/tags',
+                         {'transaction_ids': ids, 'name': f"{name}-태그"})
+                    tags = call(opener, 'GET', '/api/tags')
+                    violations += sum(tag['name'] != f"{name}-태그" for tag in tags)
+                    calls += 3
+                else:
+                    page = call(opener, 'GET', '/api/transactions?limit=50')
+                    violations += sum(
+                        tx['merchant'] != f"{name} 가맹점" for tx in page['transactions']
+                    )
+                    calls += 1
+            return violations, calls
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda session: worker(*session), sessions))
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+        db._pool.close_all()
+    
+    leaks = sum(violations for violations, _ in results)
+    total_requests = sum(calls for _, calls in results)
+    print(f"{'users':>6} {'requests':>9} {'seconds':>8} {'req/sec':>8} {'leaks':>6}")
+    print(f"{users:>6} {total_requests:>9} {elapsed:>8.3f} {total_requests / elapsed:>8.0f} {leaks:>6}")
+    if leaks:
+        raise SystemExit("다른 사용자의 데이터가 응답에 섞였습니다")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='가계부 성능 측정')
+    sub = arg_parser.add_subparsers(dest='command', required=True)
+
+    tags = sub.add_parser('tags', help='거래 목록 조회 쿼리 수')
+    tags.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+
+    import_cmd = sub.add_parser('import', help='import 저장 처리량')
+    import_cmd.add_argument('--size', type=int, default=5000)
+    
+    read_cmd = sub.add_parser('read-during-import', help='import 중 리포트 조회 지연 시간')
+    read_cmd.add_argument('--size', type=int, default=100000)
+    read_cmd.add_argument('--journal', default='wal', choices=['wal', 'delete'])
+    
+    cache_cmd = sub.add_parser('query-cache', help='카테고리/태그/규칙 조회 캐시 효과')
+    cache_cmd.add_argument('--rounds', type=int, default=2000)
+    
+    parse_cmd = sub.add_parser('parse', help='명세서 시트 파싱 속도')
+    parse_cmd.add_argument('--rows', type=int, default=50000)
+    
+    stream_cmd = sub.add_parser('stream', help='Excel import 최대 메모리')
+    stream_cmd.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000])
+    
+    csv_cmd = sub.add_parser('csv', help='CSV 파싱 처리량/최대 메모리')
+    csv_cmd.add_argument('--rows', type=int, default=100000)
+    
+    parallel_cmd = sub.add_parser('parallel', help='여러 명세서 병렬 파싱 시간')
+    parallel_cmd.add_argument('--files', type=int, default=12)
+    parallel_cmd.add_argument('--rows', type=int, default=5000)
+    parallel_cmd.add_argument('--workers', type=int, default=4)
+    
+    isolation = sub.add_parser('isolation', help='멀티스레드 사용자 DB 격리 확인')
+    isolation.add_argument('--users', type=int, default=8)
+    isolation.add_argument('--requests', type=int, default=60)
+    isolation.add_argument('--workers', type=int, default=8)
+    
+    args = arg_parser.parse_args()
+    if args.command == 'tags':
+        bench_tags(args.sizes)
+    elif args.command == 'import':
+        bench_import(args.size)
+    elif args.command == 'read-during-import':
+        bench_read_during_import(args.size, args.journal)
+    elif args.command == 'query-cache':
+        bench_query_cache(args.rounds)
+    elif args.command == 'parse':
+        bench_parse(args.rows)
+    elif args.command == 'stream':
+        bench_stream(args.sizes)
+    elif args.command == 'csv':
+        bench_csv(args.rows)
+    elif args.command == 'parallel':
+        bench_parallel(args.files, args.rows, args.workers)
+    elif args.command == 'isolation':
+        bench_isolation(args.users, args.requests, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+메모리 캐시 모듈
+키 개수 제한(LRU)과 선택적 유효 시간을 가진 스레드 안전 캐시
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """최근 사용 순으로 max_size개까지 보관하는 캐시 (ttl 초과 항목은 없는 것으로 처리)"""
+    def __init__(self, max_size, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()  # key -> (value, cached_at)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key, default=None):
+        """캐시된 값 반환 (없거나 만료되면 default)"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or (self.ttl is not None and time.monotonic() - item[1] > self.ttl):
+                self._items.pop(key, None)
+                self.stats['misses'] += 1
+                return default
+            self._items.move_to_end(key)
+            self.stats['hits'] += 1
+            return item[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.monotonic())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def get_stats(self):
+        """누적 통계 + 현재 항목 수"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self._items)
+        return stats
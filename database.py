@@ -2,26 +2,369 @@
 데이터베이스 관리 모듈
 SQLite를 사용한 로컬 데이터 저장
 """
+import json
+import os
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 from pathlib import Path
+from flask import g, has_app_context
+from cache import LRUCache
+from merchant_matcher import MerchantMatcher
 
-DB_PATH = Path(__file__).parent / "data.db"
+DB_PATH = Path(__file__).parent / "data.db"  # 컨텍스트에 경로가 없을 때 사용하는 기본 DB
 
+# 현재 요청/작업의 사용자 DB 경로 (스레드·컨텍스트별로 분리됨)
+_db_path = ContextVar('db_path', default=None)
 
-def get_connection():
-    """데이터베이스 연결 반환"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+# 거래 목록 페이지 크기 (기본/최대)
+TRANSACTIONS_PAGE_SIZE = 100
+TRANSACTIONS_PAGE_MAX = 500
+
+# 연결 풀 설정
+SQL_VARIABLE_CHUNK = 500  # IN (...) 한 번에 바인딩할 최대 변수 수 (SQLite 변수 한도 이내)
+POOL_MAX_IDLE = int(os.getenv('DB_POOL_MAX_IDLE', '8'))
+POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))
+
+# 카테고리/태그/규칙 조회 결과 캐시 크기 (사용자 DB별 조회 종류 하나가 한 항목)
+QUERY_CACHE_SIZE = int(os.getenv('DB_QUERY_CACHE_SIZE', '256'))
+
+# SQLite 연결 설정 (cache_size는 음수면 KiB 단위)
+DB_CACHE_SIZE = int(os.getenv('DB_CACHE_SIZE', '-16000'))
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(64 * 1024 * 1024)))
+DB_JOURNAL_SIZE_LIMIT = 64 * 1024 * 1024  # 체크포인트 후 WAL 파일을 이 크기로 줄임
+
+
+# ============ DB 경로 컨텍스트 ============
+
+def get_db_path():
+    """현재 컨텍스트의 DB 경로 (설정되지 않았으면 기본 DB_PATH)"""
+    return str(_db_path.get() or DB_PATH)
+
+
+def set_db_path(path):
+    """현재 컨텍스트의 DB 경로 설정 - reset_db_path()에 넘길 토큰 반환"""
+    return _db_path.set(str(path))
+
+
+def reset_db_path(token):
+    """set_db_path() 이전 경로로 복원"""
+    _db_path.reset(token)
+
+
+@contextmanager
+def use_db_path(path):
+    """with 블록 안에서만 지정한 DB 경로 사용"""
+    token = set_db_path(path)
+    try:
+        yield
+    finally:
+        reset_db_path(token)
+
+
+# ============ 연결 풀 ============
+
+def _apply_pragmas(conn):
+    """연결 설정 - WAL 모드(가져오기 중에도 읽기 가능), 커밋 fsync 완화, 캐시/mmap 크기
+    
+    journal_mode는 파일에 저장되므로 기존 DB도 처음 연결될 때 WAL로 전환됨.
+    """
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.OperationalError:
+            pass  # 다른 연결이 쓰는 중이면 다음 연결에서 다시 전환
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = {DB_CACHE_SIZE}")
+    conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    conn.execute(f"PRAGMA journal_size_limit = {DB_JOURNAL_SIZE_LIMIT}")
+    conn.execute("PRAGMA temp_store = MEMORY")
     conn.execute("PRAGMA foreign_keys = ON")
-    return conn
 
 
+class PooledConnection:
+    """풀에서 빌린 연결 래퍼 - close() 시 실제로 닫지 않고 풀에 반환"""
+    def __init__(self, pool, path, conn, request_scoped=False):
+        self._pool = pool
+        self._path = path
+        self._conn = conn
+        self._request_scoped = request_scoped
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def close(self):
+        """요청 단위 연결은 요청 종료 시 반환되므로 무시"""
+        if self._request_scoped or self._conn is None:
+            return
+        self._pool.release(self._path, self._conn)
+        self._conn = None
+
+
+class ConnectionPool:
+    """DB 경로별 SQLite 연결 풀 (유휴 연결 수 제한 및 유휴 시간 초과 연결 정리)
+    
+    유휴 시간 초과 연결은 연결 획득/반환 때와 함께 백그라운드 스레드에서도 주기적으로 정리하므로
+    요청이 없는 동안에도 체크포인트로 WAL 파일이 줄어듦.
+    """
+    def __init__(self, max_idle=POOL_MAX_IDLE, idle_timeout=POOL_IDLE_TIMEOUT):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle = []  # (path, conn, released_at) - 오래된 순
+        self._lock = threading.Lock()
+        self._reaper = None  # 유휴 연결 정리 스레드 (처음 연결을 반환할 때 시작)
+        self.stats = {'hits': 0, 'misses': 0, 'opens': 0, 'evictions': 0}
+    
+    def _open(self, path):
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn)
+        return conn
+    
+    @staticmethod
+    def _close(conn):
+        """유휴 연결 정리 - WAL 내용을 DB 파일에 반영한 뒤 닫음"""
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error:
+            pass  # 다른 연결이 사용 중이면 다음 기회에 체크포인트
+        conn.close()
+    
+    def _evict_expired(self, now):
+        """유휴 시간이 초과된 연결 정리 (lock 보유 상태에서 호출)"""
+        expired = []
+        while self._idle and now - self._idle[0][2] > self.idle_timeout:
+            expired.append(self._idle.pop(0)[1])
+        self.stats['evictions'] += len(expired)
+        return expired
+    
+    def acquire(self, path):
+        """연결 획득 - (연결, 새로 열었는지 여부) 반환"""
+        now = time.monotonic()
+        conn = None
+        with self._lock:
+            expired = self._evict_expired(now)
+            for i in range(len(self._idle) - 1, -1, -1):
+                if self._idle[i][0] == path:
+                    conn = self._idle.pop(i)[1]
+                    break
+            if conn is not None:
+                self.stats['hits'] += 1
+            else:
+                self.stats['misses'] += 1
+                self.stats['opens'] += 1
+        for old in expired:
+            self._close(old)
+        if conn is not None:
+            return conn, False
+        return self._open(path), True
+    
+    def release(self, path, conn):
+        """연결 반환 - 진행 중인 트랜잭션은 롤백"""
+        if conn.in_transaction:
+            conn.rollback()
+        now = time.monotonic()
+        with self._lock:
+            self._idle.append((path, conn, now))
+            expired = self._evict_expired(now)
+            while len(self._idle) > self.max_idle:
+                expired.append(self._idle.pop(0)[1])
+                self.stats['evictions'] += 1
+        for old in expired:
+            self._close(old)
+        self._start_reaper()
+    
+    def _start_reaper(self):
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap, name='db-pool-reaper', daemon=True)
+        self._reaper.start()
+    
+    def _reap(self):
+        """유휴 시간의 절반마다 시간이 초과된 유휴 연결을 체크포인트 후 닫음"""
+        while True:
+            time.sleep(self.idle_timeout / 2)
+            with self._lock:
+                expired = self._evict_expired(time.monotonic())
+            for old in expired:
+                self._close(old)
+    
+    def close_all(self):
+        """모든 유휴 연결 닫기"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, conn, _ in idle:
+            self._close(conn)
+
+
+_pool = ConnectionPool()
+
+
+def get_connection():
+    """데이터베이스 연결 반환 (Flask 요청 중에는 요청 단위로 하나의 연결을 공유)"""
+    path = get_db_path()
+    if not has_app_context():
+        conn, _ = _pool.acquire(path)
+        return PooledConnection(_pool, path, conn)
+    
+    conns = g.setdefault('_db_connections', {})
+    stats = g.setdefault('_db_stats', {'hits': 0, 'misses': 0, 'opens': 0})
+    if path in conns:
+        stats['hits'] += 1
+        return conns[path]
+    
+    conn, opened = _pool.acquire(path)
+    stats['misses'] += 1
+    if opened:
+        stats['opens'] += 1
+    conns[path] = PooledConnection(_pool, path, conn, request_scoped=True)
+    return conns[path]
+
+
+def get_request_stats():
+    """현재 요청의 연결 사용 통계 (hits/misses/opens)"""
+    if not has_app_context():
+        return None
+    return g.get('_db_stats')
+
+
+def release_request_connections():
+    """요청 종료 시 요청 단위 연결을 풀에 반환"""
+    if not has_app_context():
+        return
+    conns = g.pop('_db_connections', {})
+    for path, conn in conns.items():
+        _pool.release(path, conn._conn)
+
+
+def get_pool_stats():
+    """연결 풀 누적 통계"""
+    with _pool._lock:
+        stats = dict(_pool.stats)
+        stats['idle'] = len(_pool._idle)
+    return stats
+
+
+# ============ 데이터 버전 ============
+
+def _commit(conn):
+    """데이터 버전을 올리고 커밋 - 모든 쓰기 경로는 conn.commit() 대신 이 함수 사용
+    
+    버전은 같은 트랜잭션에서 올라가므로 커밋된 데이터와 항상 일치함 (ETag/응답 캐시 키로 사용).
+    """
+    conn.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+    conn.commit()
+
+
+def get_data_version():
+    """현재 DB의 데이터 버전 (쓰기가 커밋될 때마다 증가)"""
+    conn = get_connection()
+    row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+    conn.close()
+    return row['version']
+
+
+# ============ 조회 결과 캐시 ============
+# 자주 읽고 거의 바뀌지 않는 테이블(카테고리/태그/분류 규칙)의 조회 결과를 (DB 경로, 종류)별로 캐시.
+# 해당 테이블을 바꾸는 함수가 _invalidate_queries()로 관련 종류만 무효화함.
+
+_query_cache = LRUCache(QUERY_CACHE_SIZE)
+_query_generations = {}  # (DB 경로, 종류) -> 무효화 횟수
+_query_lock = threading.Lock()
+
+# 테이블 변경 시 함께 무효화할 조회 종류
+_CATEGORY_QUERIES = ('categories', 'merchant_rules', 'merchant_matcher')  # 규칙 조회에 카테고리 이름/색 포함
+_TAG_QUERIES = ('tags',)
+_RULE_QUERIES = ('merchant_rules', 'merchant_matcher')
+
+
+def _cached_query(kind, loader):
+    """캐시된 조회 결과 반환 (없으면 loader() 실행 후 저장)"""
+    key = (get_db_path(), kind)
+    value = _query_cache.get(key)
+    if value is not None:
+        return value
+    
+    with _query_lock:
+        generation = _query_generations.get(key, 0)
+    value = loader()
+    with _query_lock:
+        # 조회 중에 무효화되었으면 오래된 결과이므로 저장하지 않음
+        if _query_generations.get(key, 0) == generation:
+            _query_cache.put(key, value)
+    return value
+
+
+def _invalidate_queries(kinds):
+    """현재 DB의 지정한 조회 종류 캐시 무효화"""
+    path = get_db_path()
+    with _query_lock:
+        for kind in kinds:
+            key = (path, kind)
+            _query_generations[key] = _query_generations.get(key, 0) + 1
+            _query_cache.invalidate(key)
+
+
+def get_query_cache_stats():
+    """조회 결과 캐시 누적 통계 (hits/misses/evictions/size)"""
+    return _query_cache.get_stats()
+
+
+# ============ 스키마 ============
+
 def init_db():
-    """데이터베이스 초기화 및 테이블 생성"""
+    """데이터베이스 초기화 - PRAGMA user_version 이후의 마이그레이션만 적용
+    
+    기존 파일은 연결 시 WAL 등 연결 설정이 적용되고, 최신 버전이면 버전 조회 한 번으로 끝남.
+    """
     conn = get_connection()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        conn.close()
+        _mark_initialized(get_db_path())
+        return
+    
     cursor = conn.cursor()
+    try:
+        for step, migrate in enumerate(MIGRATIONS[version:], start=version + 1):
+            # 단계마다 테이블/트리거/백필과 버전 기록을 한 트랜잭션으로 - 중단되면 해당 단계 전체가 롤백되고
+            # 다음 실행에서 처음부터 다시 적용 (DDL도 명시적 트랜잭션 안에서는 자동 커밋되지 않음)
+            cursor.execute("BEGIN IMMEDIATE")
+            migrate(cursor)
+            cursor.execute(f"PRAGMA user_version = {step}")
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    _invalidate_queries(_CATEGORY_QUERIES + _TAG_QUERIES)
+    _mark_initialized(get_db_path())
+    print(f"Database initialized at {get_db_path()} (schema v{version} -> v{SCHEMA_VERSION})")
+
+
+def _execute_script(cursor, script):
+    """여러 문장(트리거 정의 포함)을 한 문장씩 실행
     
+    executescript()는 실행 전에 진행 중인 트랜잭션을 커밋하므로 마이그레이션 단계 안에서는 사용하지 않음.
+    """
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            cursor.execute(statement)
+            statement = ''
+    if statement.strip():
+        raise ValueError(f"완료되지 않은 SQL 문장: {statement.strip()[:80]}")
+
+
+def _migrate_base_schema(cursor):
+    """기본 테이블 및 기본 카테고리 생성"""
     # 카테고리 테이블
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS categories (
@@ -109,30 +452,483 @@ def init_db():
         ('기타', '#64748b'),
     ]
     
-    for name, color in default_categories:
-        try:
-            cursor.execute(
-                "INSERT INTO categories (name, color) VALUES (?, ?)",
-                (name, color)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO categories (name, color) VALUES (?, ?)",
+        default_categories
+    )
+
+
+def _migrate_date_columns(cursor):
+    """연월(yyyymm)/연월일(yyyymmdd) 정수 생성 컬럼과 조회용 인덱스 추가
+    
+    substr(date, ...) 조건은 인덱스를 사용할 수 없으므로 정수 생성 컬럼으로 대체.
+    VIRTUAL 생성 컬럼이라 기존 행도 별도 백필 없이 바로 값이 채워짐.
+    """
+    columns = {row[1] for row in cursor.execute("PRAGMA table_xinfo(transactions)")}
+    if 'yyyymm' not in columns:
+        cursor.execute("""
+            ALTER TABLE transactions ADD COLUMN yyyymm INTEGER
+            GENERATED ALWAYS AS (CAST(substr(date, 1, 6) AS INTEGER)) VIRTUAL
+        """)
+    if 'yyyymmdd' not in columns:
+        cursor.execute("""
+            ALTER TABLE transactions ADD COLUMN yyyymmdd INTEGER
+            GENERATED ALWAYS AS (CAST(substr(date, 1, 8) AS INTEGER)) VIRTUAL
+        """)
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_yyyymm_category ON transactions(yyyymm, category_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date_id ON transactions(date, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_merchant ON transactions(merchant)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transaction_tags_tag ON transaction_tags(tag_id)")
+
+
+def _migrate_search_index(cursor):
+    """가맹점/업종/메모/태그 전문 검색용 FTS5 테이블 및 동기화 트리거 생성
+    
+    trigram 토크나이저를 사용하므로 한글도 부분 문자열로 검색됨.
+    rowid는 transactions.id와 같음.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'"
+    ).fetchone()
+    if not exists:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE transactions_fts USING fts5(
+                merchant, business_type, memo, tags,
+                tokenize = 'trigram'
             )
-        except sqlite3.IntegrityError:
-            pass  # 이미 존재함
+        """)
+        cursor.execute(f"""
+            INSERT INTO transactions_fts (rowid, merchant, business_type, memo, tags)
+            SELECT t.id, t.merchant, t.business_type, m.content, {_FTS_TAGS_EXPR.format(tx_id='t.id')}
+            FROM transactions t
+            LEFT JOIN memos m ON t.id = m.transaction_id
+        """)
     
-    conn.commit()
-    conn.close()
-    print(f"Database initialized at {DB_PATH}")
+    _execute_script(cursor, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_insert AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO transactions_fts (rowid, merchant, business_type)
+            VALUES (NEW.id, NEW.merchant, NEW.business_type);
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_update
+        AFTER UPDATE OF merchant, business_type ON transactions
+        BEGIN
+            UPDATE transactions_fts SET merchant = NEW.merchant, business_type = NEW.business_type
+            WHERE rowid = NEW.id;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete AFTER DELETE ON transactions
+        BEGIN
+            DELETE FROM transactions_fts WHERE rowid = OLD.id;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_memos_fts_insert AFTER INSERT ON memos
+        BEGIN
+            UPDATE transactions_fts SET memo = NEW.content WHERE rowid = NEW.transaction_id;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_memos_fts_update AFTER UPDATE OF content ON memos
+        BEGIN
+            UPDATE transactions_fts SET memo = NEW.content WHERE rowid = NEW.transaction_id;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_memos_fts_delete AFTER DELETE ON memos
+        BEGIN
+            UPDATE transactions_fts SET memo = NULL WHERE rowid = OLD.transaction_id;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_tags_fts_insert AFTER INSERT ON transaction_tags
+        BEGIN
+            UPDATE transactions_fts SET tags = {_FTS_TAGS_EXPR.format(tx_id='NEW.transaction_id')}
+            WHERE rowid = NEW.transaction_id;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_tags_fts_delete AFTER DELETE ON transaction_tags
+        BEGIN
+            UPDATE transactions_fts SET tags = {_FTS_TAGS_EXPR.format(tx_id='OLD.transaction_id')}
+            WHERE rowid = OLD.transaction_id;
+        END;
+    """)
+
+
+# 거래에 붙은 태그 이름을 공백으로 이어붙인 검색용 문자열
+_FTS_TAGS_EXPR = """(
+    SELECT group_concat(tg.name, ' ') FROM transaction_tags tt
+    JOIN tags tg ON tg.id = tt.tag_id
+    WHERE tt.transaction_id = {tx_id}
+)"""
+
+# trigram 색인을 쓸 수 없는 3글자 미만 검색어용 - 전체 검색 컬럼을 이어붙여 LIKE 비교
+_FTS_LIKE_EXPR = (
+    "(coalesce(merchant, '') || ' ' || coalesce(business_type, '') || ' ' || "
+    "coalesce(memo, '') || ' ' || coalesce(tags, ''))"
+)
+
+
+def _search_condition(search):
+    """검색어를 transactions_fts 조회 조건으로 변환 - (조건 SQL, 파라미터, 순위 사용 가능 여부)
+    
+    공백으로 나눈 단어는 모두 포함되어야 함 (AND). 3글자 이상은 MATCH로 색인 검색,
+    'abc*' 형태는 접두어 검색. trigram은 3글자 미만을 색인하지 못하므로 LIKE로 처리.
+    '*'처럼 남는 단어가 없는 검색어는 아무 거래도 찾지 않는 조건을 반환.
+    """
+    match_terms = []
+    like_terms = []
+    for term in search.split():
+        is_prefix = term.endswith('*')
+        term = term.rstrip('*')
+        if not term:
+            continue
+        if len(term) >= 3:
+            phrase = '"' + term.replace('"', '""') + '"'
+            match_terms.append(phrase + ('*' if is_prefix else ''))
+        else:
+            like_terms.append(term)
+    
+    if not match_terms and not like_terms:
+        return "0", [], False
+    
+    conditions = []
+    params = []
+    if match_terms:
+        conditions.append("transactions_fts MATCH ?")
+        params.append(' AND '.join(match_terms))
+    for term in like_terms:
+        conditions.append(f"{_FTS_LIKE_EXPR} LIKE ?")
+        params.append(f"%{term}%")
+    return ' AND '.join(conditions), params, bool(match_terms)
+
+
+def _migrate_rollups(cursor):
+    """월별 카테고리/태그 집계 테이블 및 증분 갱신 트리거 생성
+    
+    리포트/대시보드 요약은 거래 원본 대신 이 테이블을 읽음.
+    category_id 0은 미분류. 거래/태그 연결이 바뀌면 트리거가 해당 월 집계만 갱신.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'monthly_rollup'"
+    ).fetchone()
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_rollup (
+            yyyymm INTEGER NOT NULL,
+            category_id INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (yyyymm, category_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_tag_rollup (
+            yyyymm INTEGER NOT NULL,
+            tag_id INTEGER NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (yyyymm, tag_id)
+        ) WITHOUT ROWID
+    """)
+    
+    if not exists:
+        cursor.execute("""
+            INSERT INTO monthly_rollup (yyyymm, category_id, count, total)
+            SELECT yyyymm, IFNULL(category_id, 0), COUNT(*), SUM(billed_amount)
+            FROM transactions
+            GROUP BY yyyymm, IFNULL(category_id, 0)
+        """)
+        cursor.execute("""
+            INSERT INTO monthly_tag_rollup (yyyymm, tag_id, count, total)
+            SELECT t.yyyymm, tt.tag_id, COUNT(*), SUM(t.billed_amount)
+            FROM transaction_tags tt
+            JOIN transactions t ON t.id = tt.transaction_id
+            GROUP BY t.yyyymm, tt.tag_id
+        """)
+    
+    _execute_script(cursor, """
+        -- 카테고리 집계
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON transactions
+        BEGIN
+            INSERT INTO monthly_rollup (yyyymm, category_id, count, total)
+            VALUES (NEW.yyyymm, IFNULL(NEW.category_id, 0), 1, NEW.billed_amount)
+            ON CONFLICT (yyyymm, category_id) DO UPDATE SET
+                count = count + 1, total = total + excluded.total;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_delete AFTER DELETE ON transactions
+        BEGIN
+            UPDATE monthly_rollup SET count = count - 1, total = total - OLD.billed_amount
+            WHERE yyyymm = OLD.yyyymm AND category_id = IFNULL(OLD.category_id, 0);
+            DELETE FROM monthly_rollup
+            WHERE yyyymm = OLD.yyyymm AND category_id = IFNULL(OLD.category_id, 0) AND count <= 0;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_update
+        AFTER UPDATE OF category_id, billed_amount, date ON transactions
+        WHEN OLD.category_id IS NOT NEW.category_id
+          OR OLD.billed_amount IS NOT NEW.billed_amount
+          OR OLD.date IS NOT NEW.date
+        BEGIN
+            UPDATE monthly_rollup SET count = count - 1, total = total - OLD.billed_amount
+            WHERE yyyymm = OLD.yyyymm AND category_id = IFNULL(OLD.category_id, 0);
+            DELETE FROM monthly_rollup
+            WHERE yyyymm = OLD.yyyymm AND category_id = IFNULL(OLD.category_id, 0) AND count <= 0;
+            INSERT INTO monthly_rollup (yyyymm, category_id, count, total)
+            VALUES (NEW.yyyymm, IFNULL(NEW.category_id, 0), 1, NEW.billed_amount)
+            ON CONFLICT (yyyymm, category_id) DO UPDATE SET
+                count = count + 1, total = total + excluded.total;
+        END;
+        
+        -- 태그 집계 (거래 삭제 시 태그 연결은 CASCADE로 지워지므로 삭제 전에 차감)
+        CREATE TRIGGER IF NOT EXISTS trg_tag_rollup_tx_delete BEFORE DELETE ON transactions
+        BEGIN
+            UPDATE monthly_tag_rollup SET count = count - 1, total = total - OLD.billed_amount
+            WHERE yyyymm = OLD.yyyymm
+              AND tag_id IN (SELECT tag_id FROM transaction_tags WHERE transaction_id = OLD.id);
+            DELETE FROM monthly_tag_rollup WHERE yyyymm = OLD.yyyymm AND count <= 0;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_tag_rollup_tx_update
+        AFTER UPDATE OF billed_amount, date ON transactions
+        WHEN OLD.billed_amount IS NOT NEW.billed_amount OR OLD.date IS NOT NEW.date
+        BEGIN
+            UPDATE monthly_tag_rollup SET count = count - 1, total = total - OLD.billed_amount
+            WHERE yyyymm = OLD.yyyymm
+              AND tag_id IN (SELECT tag_id FROM transaction_tags WHERE transaction_id = OLD.id);
+            DELETE FROM monthly_tag_rollup WHERE yyyymm = OLD.yyyymm AND count <= 0;
+            INSERT INTO monthly_tag_rollup (yyyymm, tag_id, count, total)
+            SELECT NEW.yyyymm, tag_id, 1, NEW.billed_amount
+            FROM transaction_tags WHERE transaction_id = NEW.id
+            ON CONFLICT (yyyymm, tag_id) DO UPDATE SET
+                count = count + 1, total = total + excluded.total;
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_tag_rollup_insert AFTER INSERT ON transaction_tags
+        BEGIN
+            INSERT INTO monthly_tag_rollup (yyyymm, tag_id, count, total)
+            SELECT yyyymm, NEW.tag_id, 1, billed_amount
+            FROM transactions WHERE id = NEW.transaction_id
+            ON CONFLICT (yyyymm, tag_id) DO UPDATE SET
+                count = count + 1, total = total + excluded.total;
+        END;
+        
+        -- 거래 삭제에 따른 CASCADE 삭제 시에는 거래가 이미 없으므로 아무것도 하지 않음
+        CREATE TRIGGER IF NOT EXISTS trg_tag_rollup_delete AFTER DELETE ON transaction_tags
+        BEGIN
+            UPDATE monthly_tag_rollup
+            SET count = count - 1,
+                total = total - (SELECT billed_amount FROM transactions WHERE id = OLD.transaction_id)
+            WHERE tag_id = OLD.tag_id
+              AND yyyymm = (SELECT yyyymm FROM transactions WHERE id = OLD.transaction_id);
+            DELETE FROM monthly_tag_rollup WHERE tag_id = OLD.tag_id AND count <= 0;
+        END;
+    """)
+
+
+def _migrate_merchants(cursor):
+    """가맹점 테이블(가맹점별 거래 수/합계/적용 규칙) 및 증분 갱신 트리거 생성
+    
+    거래가 추가/삭제되면 트리거가 해당 가맹점 행만 갱신하고, 새 가맹점은 그 자리에서 규칙을 찾음.
+    규칙이 바뀔 때는 _resolve_merchant_rules()로 영향받는 가맹점만 다시 계산.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'merchants'"
+    ).fetchone()
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS merchants (
+            name TEXT PRIMARY KEY,
+            business_type TEXT,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            total_amount INTEGER NOT NULL DEFAULT 0,
+            rule_id INTEGER,
+            category_id INTEGER
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_merchants_rule ON merchants(rule_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_merchants_category ON merchants(category_id)")
+    
+    if not exists:
+        cursor.execute("""
+            INSERT INTO merchants (name, business_type, tx_count, total_amount)
+            SELECT merchant, MAX(business_type), COUNT(*), SUM(billed_amount)
+            FROM transactions
+            GROUP BY merchant
+        """)
+        _resolve_merchant_rules(cursor, "1=1")
+    
+    add_merchant = f"""
+        INSERT INTO merchants (name, business_type, tx_count, total_amount)
+        VALUES (NEW.merchant, NEW.business_type, 1, NEW.billed_amount)
+        ON CONFLICT (name) DO UPDATE SET
+            tx_count = tx_count + 1,
+            total_amount = total_amount + excluded.total_amount,
+            business_type = CASE
+                WHEN business_type IS NULL OR excluded.business_type > business_type
+                THEN excluded.business_type ELSE business_type END;
+        UPDATE merchants SET (rule_id, category_id) = ({_MERCHANT_RULE_LOOKUP.format(name='NEW.merchant')})
+        WHERE name = NEW.merchant AND tx_count = 1;
+    """
+    remove_merchant = """
+        UPDATE merchants SET
+            tx_count = tx_count - 1,
+            total_amount = total_amount - OLD.billed_amount,
+            business_type = (SELECT MAX(business_type) FROM transactions WHERE merchant = OLD.merchant)
+        WHERE name = OLD.merchant;
+        DELETE FROM merchants WHERE name = OLD.merchant AND tx_count <= 0;
+    """
+    _execute_script(cursor, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_merchants_insert AFTER INSERT ON transactions
+        BEGIN
+            {add_merchant}
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_merchants_delete AFTER DELETE ON transactions
+        BEGIN
+            {remove_merchant}
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS trg_merchants_update
+        AFTER UPDATE OF merchant, business_type, billed_amount ON transactions
+        WHEN OLD.merchant IS NOT NEW.merchant
+          OR OLD.business_type IS NOT NEW.business_type
+          OR OLD.billed_amount IS NOT NEW.billed_amount
+        BEGIN
+            {remove_merchant}
+            {add_merchant}
+        END;
+    """)
+
+
+# 가맹점명(merchants.name 또는 NEW.merchant)에 적용되는 규칙 - 가장 긴 패턴 우선, 같으면 먼저 만든 규칙
+_MERCHANT_RULE_LOOKUP = """
+    SELECT id, category_id FROM merchant_category_rules
+    WHERE {name} LIKE '%' || merchant_pattern || '%'
+    ORDER BY LENGTH(merchant_pattern) DESC, id
+    LIMIT 1
+"""
+
+
+def _migrate_data_version(cursor):
+    """데이터 버전 테이블 생성 (행 하나)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 1)")
+
+
+def _migrate_imports(cursor):
+    """가져온 파일 기록 테이블 생성 (내용 해시 기준 중복 업로드 확인)"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS imports (
+            sha256 TEXT PRIMARY KEY,
+            filename TEXT,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def _migrate_merchant_index(cursor):
+    """가맹점 삭제 트리거의 MAX(business_type) 조회를 인덱스만으로 처리 (월 단위 삭제 시 행마다 호출됨)"""
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_transactions_merchant_business_type
+        ON transactions(merchant, business_type)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_transactions_merchant")  # 새 인덱스의 앞부분과 같음
+
+
+def _resolve_merchant_rules(conn, where, params=()):
+    """조건에 맞는 가맹점의 적용 규칙/카테고리 다시 계산"""
+    conn.execute(f"""
+        UPDATE merchants SET (rule_id, category_id) = (
+            {_MERCHANT_RULE_LOOKUP.format(name='merchants.name')}
+        )
+        WHERE {where}
+    """, params)
+
+
+# 스키마 마이그레이션 단계 (순서 = PRAGMA user_version). 새 단계는 끝에만 추가
+MIGRATIONS = [
+    _migrate_base_schema,
+    _migrate_date_columns,
+    _migrate_search_index,
+    _migrate_rollups,
+    _migrate_merchants,
+    _migrate_data_version,
+    _migrate_imports,
+    _migrate_merchant_index,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# 이 프로세스에서 마이그레이션을 마친 DB 경로
+_initialized_paths = set()
+_initialized_locks = {}
+_initialized_lock = threading.Lock()
+
+
+def _mark_initialized(path):
+    with _initialized_lock:
+        _initialized_paths.add(path)
+
+
+def ensure_db(path):
+    """DB 마이그레이션 보장 (프로세스당 경로별 한 번만 실행)"""
+    path = str(path)
+    if path in _initialized_paths:
+        return
+    with _initialized_lock:
+        lock = _initialized_locks.setdefault(path, threading.Lock())
+    with lock:
+        if path in _initialized_paths:
+            return
+        with use_db_path(path):
+            init_db()
+
+
+def migrate_user_dbs(base_path, workers=4):
+    """기존 사용자 DB(data_*.db) 전체에 밀린 마이그레이션을 병렬로 적용"""
+    paths = sorted(Path(base_path).glob('data_*.db'))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(ensure_db, paths))
+
+
+def _yyyymm(year, month):
+    """연도+월을 yyyymm 정수로 변환"""
+    return int(year) * 100 + int(month)
+
+
+def _add_period_filter(query, params, year=None, month=None, column='t.yyyymm'):
+    """연도/월 필터 조건 추가 (yyyymm 인덱스를 탈 수 있는 형태로)"""
+    if year and month:
+        query += f" AND {column} = ?"
+        params.append(_yyyymm(year, month))
+    elif year:
+        query += f" AND {column} BETWEEN ? AND ?"
+        params.extend([_yyyymm(year, 1), _yyyymm(year, 12)])
+    elif month:
+        query += f" AND {column} % 100 = ?"
+        params.append(int(month))
+    return query
 
 
 # ============ 카테고리 CRUD ============
 
-def get_categories():
-    """모든 카테고리 조회"""
+def _load_categories():
     conn = get_connection()
     rows = conn.execute("SELECT * FROM categories ORDER BY name").fetchall()
     conn.close()
     return [dict(row) for row in rows]
 
 
+def get_categories():
+    """모든 카테고리 조회 (캐시)"""
+    return [dict(row) for row in _cached_query('categories', _load_categories)]
+
+
 def create_category(name, color='#6366f1'):
     """새 카테고리 생성"""
     conn = get_connection()
@@ -141,9 +937,10 @@ def create_category(name, color='#6366f1'):
             "INSERT INTO categories (name, color) VALUES (?, ?)",
             (name, color)
         )
-        conn.commit()
+        _commit(conn)
         cat_id = cursor.lastrowid
         conn.close()
+        _invalidate_queries(_CATEGORY_QUERIES)
         return cat_id
     except sqlite3.IntegrityError:
         conn.close()
@@ -157,8 +954,9 @@ def update_category(cat_id, name=None, color=None):
         conn.execute("UPDATE categories SET name = ? WHERE id = ?", (name, cat_id))
     if color:
         conn.execute("UPDATE categories SET color = ? WHERE id = ?", (color, cat_id))
-    conn.commit()
+    _commit(conn)
     conn.close()
+    _invalidate_queries(_CATEGORY_QUERIES)
 
 
 def delete_category(cat_id):
@@ -167,94 +965,215 @@ def delete_category(cat_id):
     # 해당 카테고리의 거래들은 NULL로 설정
     conn.execute("UPDATE transactions SET category_id = NULL WHERE category_id = ?", (cat_id,))
     conn.execute("DELETE FROM merchant_category_rules WHERE category_id = ?", (cat_id,))
+    _resolve_merchant_rules(conn, "category_id = ?", (cat_id,))
     conn.execute("DELETE FROM categories WHERE id = ?", (cat_id,))
-    conn.commit()
+    _commit(conn)
     conn.close()
+    _invalidate_queries(_CATEGORY_QUERIES)
 
 
 # ============ 거래 내역 CRUD ============
 
+# 거래별 태그 목록을 JSON 배열로 함께 조회 (행마다 태그를 따로 조회하지 않음)
+_TX_TAGS_COLUMN = """(
+    SELECT json_group_array(json_object('id', tg.id, 'name', tg.name, 'color', tg.color))
+    FROM transaction_tags tt
+    JOIN tags tg ON tg.id = tt.tag_id
+    WHERE tt.transaction_id = t.id
+) as tags_json"""
+
+
+def _rows_to_transactions(rows):
+    """조회 결과 행을 거래 dict 목록으로 변환 (tags_json -> tags)"""
+    transactions = []
+    for row in rows:
+        tx = dict(row)
+        tx['tags'] = json.loads(tx.pop('tags_json'))
+        transactions.append(tx)
+    return transactions
+
+
+# INSERT 컬럼 순서와 거래 dict에 키가 없을 때의 기본값
+_TRANSACTION_COLUMNS = (
+    ('date', None),
+    ('receipt_date', None),
+    ('merchant', None),
+    ('business_type', None),
+    ('country', None),
+    ('local_amount', None),
+    ('currency', None),
+    ('usd_amount', None),
+    ('exchange_rate', None),
+    ('krw_amount', 0),
+    ('fee', 0),
+    ('billed_amount', 0),
+    ('category_id', None),
+    ('card_number', None),
+    ('is_overseas', 0),
+)
+_TRANSACTION_DEFAULTS = dict(_TRANSACTION_COLUMNS)
+
+# 값이 없으면 저장하지 않는 필드 (NOT NULL 컬럼)
+_REQUIRED_TRANSACTION_FIELDS = ('date', 'merchant', 'krw_amount', 'billed_amount')
+
+_TRANSACTION_INSERT = f"""
+    INSERT INTO transactions ({', '.join(name for name, _ in _TRANSACTION_COLUMNS)})
+    VALUES ({', '.join('?' * len(_TRANSACTION_COLUMNS))})
+"""
+
+
+def _transaction_values(data):
+    """거래 dict를 INSERT 파라미터 튜플로 변환"""
+    return tuple(data.get(name, default) for name, default in _TRANSACTION_COLUMNS)
+
+
+def _has_required_fields(data):
+    """필수 값(날짜/가맹점/금액)이 모두 있는 거래인지"""
+    return all(data.get(name, _TRANSACTION_DEFAULTS[name]) is not None
+               for name in _REQUIRED_TRANSACTION_FIELDS)
+
+
 def add_transaction(data):
     """거래 내역 추가"""
     conn = get_connection()
-    cursor = conn.execute("""
-        INSERT INTO transactions 
-        (date, receipt_date, merchant, business_type, country, 
-         local_amount, currency, usd_amount, exchange_rate, 
-         krw_amount, fee, billed_amount, category_id, card_number, is_overseas)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        data.get('date'),
-        data.get('receipt_date'),
-        data.get('merchant'),
-        data.get('business_type'),
-        data.get('country'),
-        data.get('local_amount'),
-        data.get('currency'),
-        data.get('usd_amount'),
-        data.get('exchange_rate'),
-        data.get('krw_amount', 0),
-        data.get('fee', 0),
-        data.get('billed_amount', 0),
-        data.get('category_id'),
-        data.get('card_number'),
-        data.get('is_overseas', 0)
-    ))
-    conn.commit()
+    cursor = conn.execute(_TRANSACTION_INSERT, _transaction_values(data))
+    _commit(conn)
     tx_id = cursor.lastrowid
     conn.close()
     return tx_id
 
 
+def _transaction_filter_sql(filters):
+    """거래 조회 필터를 SQL 조각으로 변환 - (검색 조인, WHERE 조건, 파라미터, 순위 정렬 여부)"""
+    params = []
+    search_join = ""
+    ranked = False
+    where = "WHERE 1=1"
+    if not filters:
+        return search_join, where, params, ranked
+    
+    # 검색어는 전문 검색 테이블에서 먼저 거래 ID를 찾아 조인
+    if filters.get('search'):
+        search_sql, search_params, has_match = _search_condition(filters['search'])
+        rank_column = "rank" if has_match else "0 as rank"
+        search_join = f"""
+            JOIN (SELECT rowid, {rank_column} FROM transactions_fts WHERE {search_sql}) s
+            ON s.rowid = t.id
+        """
+        params.extend(search_params)
+        ranked = filters.get('sort') == 'relevance'
+    
+    where = _add_period_filter(where, params, filters.get('year'), filters.get('month'))
+    if filters.get('category_id'):
+        where += " AND t.category_id = ?"
+        params.append(filters['category_id'])
+    if filters.get('tag_id'):
+        where += " AND t.id IN (SELECT transaction_id FROM transaction_tags WHERE tag_id = ?)"
+        params.append(filters['tag_id'])
+    return search_join, where, params, ranked
+
+
 def get_transactions(filters=None):
     """거래 내역 조회 (필터링 지원)"""
     conn = get_connection()
-    query = """
+    search_join, where, params, ranked = _transaction_filter_sql(filters)
+    order_by = "s.rank, t.date DESC, t.id DESC" if ranked else "t.date DESC, t.id DESC"
+    
+    query = f"""
         SELECT t.*, c.name as category_name, c.color as category_color,
-               m.content as memo
+               m.content as memo, {_TX_TAGS_COLUMN}
         FROM transactions t
+        {search_join}
         LEFT JOIN categories c ON t.category_id = c.id
         LEFT JOIN memos m ON t.id = m.transaction_id
-        WHERE 1=1
+        {where}
+        ORDER BY {order_by}
     """
-    params = []
-    
-    if filters:
-        if filters.get('year'):
-            query += " AND substr(t.date, 1, 4) = ?"
-            params.append(str(filters['year']))
-        if filters.get('month'):
-            query += " AND substr(t.date, 5, 2) = ?"
-            params.append(str(filters['month']).zfill(2))
-        if filters.get('category_id'):
-            query += " AND t.category_id = ?"
-            params.append(filters['category_id'])
-        if filters.get('tag_id'):
-            query += " AND t.id IN (SELECT transaction_id FROM transaction_tags WHERE tag_id = ?)"
-            params.append(filters['tag_id'])
-        if filters.get('search'):
-            query += " AND (t.merchant LIKE ? OR t.business_type LIKE ?)"
-            search = f"%{filters['search']}%"
-            params.extend([search, search])
-    
-    query += " ORDER BY t.date DESC, t.id DESC"
     
     rows = conn.execute(query, params).fetchall()
-    transactions = []
+    conn.close()
+    return _rows_to_transactions(rows)
+
+
+def encode_cursor(tx, ranked=False):
+    """페이지 커서 생성 - 마지막 거래의 (date, id), 관련도순이면 rank 포함"""
+    cursor = f"{tx['date']}:{tx['id']}"
+    if ranked:
+        cursor = f"{tx['rank']!r}:{cursor}"
+    return cursor
+
+
+def decode_cursor(cursor, ranked=False):
+    """페이지 커서 해석 - 형식이 잘못되면 ValueError"""
+    parts = cursor.split(':')
+    if ranked:
+        if len(parts) != 3:
+            raise ValueError(f"잘못된 커서: {cursor}")
+        return float(parts[0]), parts[1], int(parts[2])
+    if len(parts) != 2:
+        raise ValueError(f"잘못된 커서: {cursor}")
+    return parts[0], int(parts[1])
+
+
+def get_transactions_page(filters=None, cursor=None, limit=TRANSACTIONS_PAGE_SIZE):
+    """거래 내역 페이지 조회 (date, id 기준 keyset 페이지네이션)
     
-    for row in rows:
-        tx = dict(row)
-        # 해당 거래의 태그들 조회
-        tags = conn.execute("""
-            SELECT t.* FROM tags t
-            JOIN transaction_tags tt ON t.id = tt.tag_id
-            WHERE tt.transaction_id = ?
-        """, (tx['id'],)).fetchall()
-        tx['tags'] = [dict(tag) for tag in tags]
-        transactions.append(tx)
+    반환: (거래 목록, 다음 페이지 커서 또는 None)
+    """
+    limit = max(1, min(int(limit), TRANSACTIONS_PAGE_MAX))
+    search_join, where, params, ranked = _transaction_filter_sql(filters)
+    
+    # 직전 페이지 마지막 행 이후부터 (정렬 순서: date DESC, id DESC)
+    if cursor:
+        if ranked:
+            rank, date, tx_id = decode_cursor(cursor, ranked=True)
+            where += """ AND (s.rank > ? OR (s.rank = ? AND
+                         (t.date < ? OR (t.date = ? AND t.id < ?))))"""
+            params.extend([rank, rank, date, date, tx_id])
+        else:
+            date, tx_id = decode_cursor(cursor)
+            where += " AND (t.date < ? OR (t.date = ? AND t.id < ?))"
+            params.extend([date, date, tx_id])
     
+    order_by = "s.rank, t.date DESC, t.id DESC" if ranked else "t.date DESC, t.id DESC"
+    rank_column = ", s.rank as rank" if ranked else ""
+    
+    conn = get_connection()
+    rows = conn.execute(f"""
+        SELECT t.*, c.name as category_name, c.color as category_color,
+               m.content as memo, {_TX_TAGS_COLUMN}{rank_column}
+        FROM transactions t
+        {search_join}
+        LEFT JOIN categories c ON t.category_id = c.id
+        LEFT JOIN memos m ON t.id = m.transaction_id
+        {where}
+        ORDER BY {order_by}
+        LIMIT ?
+    """, params + [limit + 1]).fetchall()
     conn.close()
-    return transactions
+    
+    transactions = _rows_to_transactions(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(transactions[-1], ranked)
+    if ranked:
+        for tx in transactions:
+            tx.pop('rank')
+    return transactions, next_cursor
+
+
+def get_transactions_summary(filters=None):
+    """필터 조건에 맞는 거래 건수 및 합계"""
+    search_join, where, params, _ = _transaction_filter_sql(filters)
+    conn = get_connection()
+    row = conn.execute(f"""
+        SELECT COUNT(*) as count, COALESCE(SUM(t.billed_amount), 0) as total
+        FROM transactions t
+        {search_join}
+        {where}
+    """, params).fetchone()
+    conn.close()
+    return dict(row)
 
 
 def update_transaction_category(tx_id, category_id):
@@ -264,7 +1183,7 @@ def update_transaction_category(tx_id, category_id):
         "UPDATE transactions SET category_id = ? WHERE id = ?",
         (category_id, tx_id)
     )
-    conn.commit()
+    _commit(conn)
     conn.close()
 
 
@@ -272,10 +1191,54 @@ def delete_transaction(tx_id):
     """거래 삭제"""
     conn = get_connection()
     conn.execute("DELETE FROM transactions WHERE id = ?", (tx_id,))
-    conn.commit()
+    _commit(conn)
     conn.close()
 
 
+def _chunks(ids, size=SQL_VARIABLE_CHUNK):
+    """ID 목록을 IN 절 변수 한도 이내로 분할"""
+    ids = list(dict.fromkeys(ids))  # 중복 제거 (순서 유지)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _bulk_execute(sql, ids, params_before=(), params_after=()):
+    """`{ids}` 자리에 ID 묶음을 넣어 청크별로 실행 - 전체를 하나의 트랜잭션으로 커밋
+    
+    Returns: 영향받은 행 수
+    """
+    conn = get_connection()
+    try:
+        affected = 0
+        for chunk in _chunks(ids):
+            placeholders = ','.join('?' * len(chunk))
+            cursor = conn.execute(
+                sql.format(ids=placeholders),
+                (*params_before, *chunk, *params_after)
+            )
+            affected += cursor.rowcount
+        _commit(conn)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return affected
+
+
+def bulk_update_transaction_category(tx_ids, category_id):
+    """여러 거래의 카테고리 일괄 수정"""
+    return _bulk_execute(
+        "UPDATE transactions SET category_id = ? WHERE id IN ({ids})",
+        tx_ids, params_before=(category_id,)
+    )
+
+
+def bulk_delete_transactions(tx_ids):
+    """여러 거래 일괄 삭제"""
+    return _bulk_execute("DELETE FROM transactions WHERE id IN ({ids})", tx_ids)
+
+
 # ============ 메모 CRUD ============
 
 def set_memo(tx_id, content):
@@ -290,20 +1253,24 @@ def set_memo(tx_id, content):
         """, (tx_id, content.strip()))
     else:
         conn.execute("DELETE FROM memos WHERE transaction_id = ?", (tx_id,))
-    conn.commit()
+    _commit(conn)
     conn.close()
 
 
 # ============ 태그 CRUD ============
 
-def get_tags():
-    """모든 태그 조회"""
+def _load_tags():
     conn = get_connection()
     rows = conn.execute("SELECT * FROM tags ORDER BY name").fetchall()
     conn.close()
     return [dict(row) for row in rows]
 
 
+def get_tags():
+    """모든 태그 조회 (캐시)"""
+    return [dict(row) for row in _cached_query('tags', _load_tags)]
+
+
 def create_tag(name, color='#10b981'):
     """새 태그 생성"""
     conn = get_connection()
@@ -312,9 +1279,10 @@ def create_tag(name, color='#10b981'):
             "INSERT INTO tags (name, color) VALUES (?, ?)",
             (name.strip(), color)
         )
-        conn.commit()
+        _commit(conn)
         tag_id = cursor.lastrowid
         conn.close()
+        _invalidate_queries(_TAG_QUERIES)
         return tag_id
     except sqlite3.IntegrityError:
         # 이미 존재하면 기존 ID 반환
@@ -331,7 +1299,7 @@ def add_tag_to_transaction(tx_id, tag_id):
             "INSERT INTO transaction_tags (transaction_id, tag_id) VALUES (?, ?)",
             (tx_id, tag_id)
         )
-        conn.commit()
+        _commit(conn)
     except sqlite3.IntegrityError:
         pass  # 이미 연결됨
     conn.close()
@@ -344,10 +1312,31 @@ def remove_tag_from_transaction(tx_id, tag_id):
         "DELETE FROM transaction_tags WHERE transaction_id = ? AND tag_id = ?",
         (tx_id, tag_id)
     )
-    conn.commit()
+    _commit(conn)
     conn.close()
 
 
+def bulk_add_tag(tx_ids, tag_id):
+    """여러 거래에 태그 일괄 추가 (이미 연결된 거래는 건너뜀)"""
+    return _bulk_execute("""
+        INSERT INTO transaction_tags (transaction_id, tag_id)
+        SELECT t.id, ? FROM transactions t
+        WHERE t.id IN ({ids})
+          AND NOT EXISTS (
+              SELECT 1 FROM transaction_tags tt
+              WHERE tt.transaction_id = t.id AND tt.tag_id = ?
+          )
+    """, tx_ids, params_before=(tag_id,), params_after=(tag_id,))
+
+
+def bulk_remove_tag(tx_ids, tag_id):
+    """여러 거래에서 태그 일괄 제거"""
+    return _bulk_execute(
+        "DELETE FROM transaction_tags WHERE tag_id = ? AND transaction_id IN ({ids})",
+        tx_ids, params_before=(tag_id,)
+    )
+
+
 def search_tags(query):
     """태그 자동완성 검색"""
     conn = get_connection()
@@ -361,50 +1350,80 @@ def search_tags(query):
 
 # ============ 가맹점 분류 규칙 ============
 
-def get_category_by_merchant(merchant):
-    """가맹점명으로 카테고리 자동 조회"""
+# DB 경로별 컴파일된 규칙 매처 (규칙/카테고리 변경 시 무효화)
+def _load_merchant_matcher():
     conn = get_connection()
-    row = conn.execute("""
-        SELECT c.id, c.name, c.color FROM merchant_category_rules mcr
+    rows = conn.execute("""
+        SELECT mcr.merchant_pattern, c.id, c.name, c.color FROM merchant_category_rules mcr
         JOIN categories c ON mcr.category_id = c.id
-        WHERE ? LIKE '%' || mcr.merchant_pattern || '%'
-        ORDER BY LENGTH(mcr.merchant_pattern) DESC
-        LIMIT 1
-    """, (merchant,)).fetchone()
+        ORDER BY mcr.id
+    """).fetchall()
     conn.close()
-    return dict(row) if row else None
+    return MerchantMatcher(
+        (row['merchant_pattern'], {'id': row['id'], 'name': row['name'], 'color': row['color']})
+        for row in rows
+    )
 
 
-def set_merchant_category_rule(merchant_pattern, category_id):
-    """가맹점 분류 규칙 설정"""
-    conn = get_connection()
+def get_merchant_matcher():
+    """현재 DB의 가맹점 분류 규칙으로 만든 매처 반환 (캐시)"""
+    return _cached_query('merchant_matcher', _load_merchant_matcher)
+
+
+def get_category_by_merchant(merchant):
+    """가맹점명으로 카테고리 자동 조회"""
+    category = get_merchant_matcher().match(merchant)
+    return dict(category) if category else None
+
+
+def classify_merchants(merchants):
+    """가맹점명 목록 일괄 분류 - {가맹점명: 카테고리 dict 또는 None}"""
+    matcher = get_merchant_matcher()
+    result = {}
+    for merchant in merchants:
+        if merchant not in result:
+            category = matcher.match(merchant)
+            result[merchant] = dict(category) if category else None
+    return result
+
+
+def _save_merchant_rule(conn, merchant_pattern, category_id):
+    """규칙 저장 후 패턴에 걸리는 가맹점과 기존에 이 규칙이 적용된 가맹점만 다시 계산"""
     conn.execute("""
         INSERT INTO merchant_category_rules (merchant_pattern, category_id)
         VALUES (?, ?)
         ON CONFLICT(merchant_pattern) DO UPDATE SET category_id = excluded.category_id
     """, (merchant_pattern, category_id))
-    conn.commit()
+    rule_id = conn.execute(
+        "SELECT id FROM merchant_category_rules WHERE merchant_pattern = ?", (merchant_pattern,)
+    ).fetchone()['id']
+    _resolve_merchant_rules(
+        conn, "name LIKE '%' || ? || '%' OR rule_id = ?", (merchant_pattern, rule_id)
+    )
+
+
+def set_merchant_category_rule(merchant_pattern, category_id):
+    """가맹점 분류 규칙 설정"""
+    conn = get_connection()
+    _save_merchant_rule(conn, merchant_pattern, category_id)
+    _commit(conn)
     conn.close()
+    _invalidate_queries(_RULE_QUERIES)
 
 
 def get_all_merchants():
     """전체 가맹점 목록 조회 (중복 제거)"""
     conn = get_connection()
     rows = conn.execute("""
-        SELECT DISTINCT merchant, 
-               MAX(business_type) as business_type,
-               COUNT(*) as tx_count,
-               SUM(billed_amount) as total_amount
-        FROM transactions
-        GROUP BY merchant
-        ORDER BY merchant
+        SELECT name as merchant, business_type, tx_count, total_amount
+        FROM merchants
+        ORDER BY name
     """).fetchall()
     conn.close()
     return [dict(row) for row in rows]
 
 
-def get_merchant_rules():
-    """가맹점 분류 규칙 목록 조회"""
+def _load_merchant_rules():
     conn = get_connection()
     rows = conn.execute("""
         SELECT mcr.id, mcr.merchant_pattern, mcr.category_id,
@@ -417,55 +1436,56 @@ def get_merchant_rules():
     return [dict(row) for row in rows]
 
 
+def get_merchant_rules():
+    """가맹점 분류 규칙 목록 조회 (캐시)"""
+    return [dict(row) for row in _cached_query('merchant_rules', _load_merchant_rules)]
+
+
 def get_uncategorized_merchants():
     """카테고리 규칙이 없는 가맹점 목록"""
     conn = get_connection()
     rows = conn.execute("""
-        SELECT DISTINCT t.merchant,
-               MAX(t.business_type) as business_type,
-               COUNT(*) as tx_count,
-               SUM(t.billed_amount) as total_amount
-        FROM transactions t
-        WHERE NOT EXISTS (
-            SELECT 1 FROM merchant_category_rules mcr
-            WHERE t.merchant LIKE '%' || mcr.merchant_pattern || '%'
-        )
-        GROUP BY t.merchant
-        ORDER BY t.merchant
+        SELECT name as merchant, business_type, tx_count, total_amount
+        FROM merchants
+        WHERE rule_id IS NULL
+        ORDER BY name
     """).fetchall()
     conn.close()
     return [dict(row) for row in rows]
 
 
 def apply_category_to_all_transactions_by_merchant(merchant_pattern, category_id):
-    """특정 가맹점의 모든 거래에 카테고리 일괄 적용"""
+    """특정 가맹점의 모든 거래에 카테고리 일괄 적용 - 카테고리를 적용한 거래 수 반환"""
     conn = get_connection()
     # 규칙 저장
-    conn.execute("""
-        INSERT INTO merchant_category_rules (merchant_pattern, category_id)
-        VALUES (?, ?)
-        ON CONFLICT(merchant_pattern) DO UPDATE SET category_id = excluded.category_id
-    """, (merchant_pattern, category_id))
+    _save_merchant_rule(conn, merchant_pattern, category_id)
     
-    # 기존 거래들에도 적용
-    conn.execute("""
+    # 기존 거래들에도 적용 (가맹점 테이블에서 이름을 찾아 merchant 인덱스로 갱신)
+    cursor = conn.execute("""
         UPDATE transactions 
         SET category_id = ?
-        WHERE merchant LIKE '%' || ? || '%'
+        WHERE merchant IN (SELECT name FROM merchants WHERE name LIKE '%' || ? || '%')
     """, (category_id, merchant_pattern))
     
-    conn.commit()
-    affected = conn.total_changes
+    _commit(conn)
+    affected = cursor.rowcount
     conn.close()
+    _invalidate_queries(_RULE_QUERIES)
     return affected
 
 
 def delete_merchant_rule(merchant_pattern):
     """가맹점 분류 규칙 삭제"""
     conn = get_connection()
-    conn.execute("DELETE FROM merchant_category_rules WHERE merchant_pattern = ?", (merchant_pattern,))
-    conn.commit()
+    row = conn.execute(
+        "SELECT id FROM merchant_category_rules WHERE merchant_pattern = ?", (merchant_pattern,)
+    ).fetchone()
+    if row:
+        conn.execute("DELETE FROM merchant_category_rules WHERE id = ?", (row['id'],))
+        _resolve_merchant_rules(conn, "rule_id = ?", (row['id'],))
+    _commit(conn)
     conn.close()
+    _invalidate_queries(_RULE_QUERIES)
 
 
 # ============ 기존 거래 삭제 (중복 방지) ============
@@ -473,46 +1493,96 @@ def delete_merchant_rule(merchant_pattern):
 def delete_transactions_by_month(year, month):
     """특정 연도+월의 모든 거래 삭제"""
     conn = get_connection()
-    month_str = f"{year}{str(month).zfill(2)}"
     cursor = conn.execute(
-        "DELETE FROM transactions WHERE substr(date, 1, 6) = ?",
-        (month_str,)
+        "DELETE FROM transactions WHERE yyyymm = ?",
+        (_yyyymm(year, month),)
     )
     deleted_count = cursor.rowcount
-    conn.commit()
+    _commit(conn)
     conn.close()
     print(f"Deleted {deleted_count} transactions for {year}-{month}")
     return deleted_count
 
 
+def replace_transactions_by_month(transactions):
+    """거래 일괄 저장 - 거래가 속한 월의 기존 데이터 삭제와 전체 INSERT를 하나의 트랜잭션으로 처리
+    
+    필수 값(날짜/가맹점/금액)이 없는 행은 건너뛰며, 중간에 실패하면 삭제까지 모두 롤백됨.
+    Returns: (삭제 건수, 저장 건수, 건너뛴 건수)
+    """
+    return replace_transaction_batches([transactions])
+
+
+def replace_transaction_batches(batches, progress=None):
+    """거래 묶음을 차례로 저장 - 묶음에서 처음 나온 월은 기존 데이터를 먼저 삭제
+    
+    전체 묶음을 하나의 트랜잭션으로 처리하므로 중간에 실패하면 삭제까지 모두 롤백됨.
+    첫 삭제부터 커밋까지 쓰기 잠금을 잡고 있으므로 batches는 파싱이 끝난 결과를 넘길 것.
+    progress: 묶음마다 progress(지금까지 저장한 건수) 호출 (커밋 전)
+    Returns: (삭제 건수, 저장 건수, 건너뛴 건수)
+    """
+    conn = get_connection()
+    try:
+        deleted = inserted = skipped = 0
+        months = set()
+        for transactions in batches:
+            rows = []
+            for tx in transactions:
+                if not _has_required_fields(tx):
+                    skipped += 1
+                    continue
+                rows.append(_transaction_values(tx))
+                date = tx['date']
+                if len(date) >= 6:
+                    yyyymm = _yyyymm(int(date[:4]), int(date[4:6]))
+                    if yyyymm not in months:
+                        months.add(yyyymm)
+                        deleted += conn.execute(
+                            "DELETE FROM transactions WHERE yyyymm = ?", (yyyymm,)
+                        ).rowcount
+            conn.executemany(_TRANSACTION_INSERT, rows)
+            inserted += len(rows)
+            if progress:
+                progress(inserted)
+        _commit(conn)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return deleted, inserted, skipped
+
+
 def get_all_months_in_data():
-    """데이터에 존재하는 모든 연도+월 조합 반환"""
+    """데이터에 존재하는 모든 연도+월 조합 반환 (월별 집계 테이블 기준)"""
     conn = get_connection()
     rows = conn.execute("""
-        SELECT DISTINCT substr(date, 1, 4) as year, substr(date, 5, 2) as month
-        FROM transactions
-        ORDER BY year DESC, month DESC
+        SELECT DISTINCT yyyymm FROM monthly_rollup
+        WHERE yyyymm > 0 AND count > 0
+        ORDER BY yyyymm DESC
     """).fetchall()
     conn.close()
-    return [(int(row['year']), int(row['month'])) for row in rows]
+    return [divmod(row['yyyymm'], 100) for row in rows]
+
+
+def get_available_years():
+    """데이터에 존재하는 연도 목록 (최신순)"""
+    return sorted({year for year, _ in get_all_months_in_data()}, reverse=True)
 
 
 def get_summary_by_date_range(start_year, start_month, end_year, end_month):
     """기간별 카테고리별 지출 요약"""
     conn = get_connection()
-    start_str = f"{start_year}{str(start_month).zfill(2)}"
-    end_str = f"{end_year}{str(end_month).zfill(2)}"
-    
     rows = conn.execute("""
         SELECT c.id, c.name, c.color, 
-               COUNT(t.id) as count,
-               SUM(t.billed_amount) as total
-        FROM transactions t
-        LEFT JOIN categories c ON t.category_id = c.id
-        WHERE substr(t.date, 1, 6) >= ? AND substr(t.date, 1, 6) <= ?
+               SUM(r.count) as count,
+               SUM(r.total) as total
+        FROM monthly_rollup r
+        LEFT JOIN categories c ON r.category_id = c.id
+        WHERE r.yyyymm BETWEEN ? AND ?
         GROUP BY c.id
         ORDER BY total DESC
-    """, (start_str, end_str)).fetchall()
+    """, (_yyyymm(start_year, start_month), _yyyymm(end_year, end_month))).fetchall()
     
     conn.close()
     return [dict(row) for row in rows]
@@ -521,34 +1591,65 @@ def get_summary_by_date_range(start_year, start_month, end_year, end_month):
 def get_transactions_by_date_range(start_year, start_month, end_year, end_month):
     """기간별 거래 내역 조회"""
     conn = get_connection()
-    start_str = f"{start_year}{str(start_month).zfill(2)}"
-    end_str = f"{end_year}{str(end_month).zfill(2)}"
-    
-    query = """
+    query = f"""
         SELECT t.*, c.name as category_name, c.color as category_color,
-               m.content as memo
+               m.content as memo, {_TX_TAGS_COLUMN}
         FROM transactions t
         LEFT JOIN categories c ON t.category_id = c.id
         LEFT JOIN memos m ON t.id = m.transaction_id
-        WHERE substr(t.date, 1, 6) >= ? AND substr(t.date, 1, 6) <= ?
+        WHERE t.yyyymm BETWEEN ? AND ?
         ORDER BY t.date DESC, t.id DESC
     """
     
-    rows = conn.execute(query, (start_str, end_str)).fetchall()
-    transactions = []
-    
-    for row in rows:
-        tx = dict(row)
-        tags = conn.execute("""
-            SELECT t.* FROM tags t
-            JOIN transaction_tags tt ON t.id = tt.tag_id
-            WHERE tt.transaction_id = ?
-        """, (tx['id'],)).fetchall()
-        tx['tags'] = [dict(tag) for tag in tags]
-        transactions.append(tx)
+    rows = conn.execute(query, (_yyyymm(start_year, start_month), _yyyymm(end_year, end_month))).fetchall()
+    conn.close()
+    return _rows_to_transactions(rows)
+
+
+def get_recent_transactions(start_year, start_month, end_year, end_month, limit=10, offset=0):
+    """기간 내 최근 거래 limit건 조회 - 정렬/LIMIT을 먼저 적용하고 남은 행에만 카테고리/메모/태그 결합
     
+    yyyymm 조건과 같은 범위의 date 조건을 함께 걸어 (date, id) 인덱스를 역순으로 읽다가 limit건에서 멈춤.
+    """
+    start, end = _yyyymm(start_year, start_month), _yyyymm(end_year, end_month)
+    conn = get_connection()
+    rows = conn.execute(f"""
+        SELECT t.*, c.name as category_name, c.color as category_color,
+               m.content as memo, {_TX_TAGS_COLUMN}
+        FROM (
+            SELECT id FROM transactions
+            WHERE date >= ? AND date < ? AND yyyymm BETWEEN ? AND ?
+            ORDER BY date DESC, id DESC
+            LIMIT ? OFFSET ?
+        ) page
+        JOIN transactions t ON t.id = page.id
+        LEFT JOIN categories c ON t.category_id = c.id
+        LEFT JOIN memos m ON t.id = m.transaction_id
+        ORDER BY t.date DESC, t.id DESC
+    """, (str(start), str(end + 1), start, end, limit, offset)).fetchall()
+    conn.close()
+    return _rows_to_transactions(rows)
+
+
+# ============ 가져온 파일 기록 ============
+
+def get_import(sha256):
+    """내용 해시로 이전에 가져온 파일 기록 조회 (없으면 None)"""
+    conn = get_connection()
+    row = conn.execute("SELECT * FROM imports WHERE sha256 = ?", (sha256,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def record_import(sha256, filename):
+    """파일 가져오기 완료 기록 (다시 가져오면 시각 갱신)"""
+    conn = get_connection()
+    conn.execute("""
+        INSERT INTO imports (sha256, filename) VALUES (?, ?)
+        ON CONFLICT(sha256) DO UPDATE SET filename = excluded.filename, imported_at = CURRENT_TIMESTAMP
+    """, (sha256, filename))
+    _commit(conn)
     conn.close()
-    return transactions
 
 
 # ============ 리포트/분석 ============
@@ -556,18 +1657,16 @@ def get_transactions_by_date_range(start_year, start_month, end_year, end_month)
 def get_monthly_summary(year, month):
     """월별 카테고리별 지출 요약"""
     conn = get_connection()
-    month_str = f"{year}{str(month).zfill(2)}"
-    
     rows = conn.execute("""
         SELECT c.id, c.name, c.color, 
-               COUNT(t.id) as count,
-               SUM(t.billed_amount) as total
-        FROM transactions t
-        LEFT JOIN categories c ON t.category_id = c.id
-        WHERE substr(t.date, 1, 6) = ?
+               SUM(r.count) as count,
+               SUM(r.total) as total
+        FROM monthly_rollup r
+        LEFT JOIN categories c ON r.category_id = c.id
+        WHERE r.yyyymm = ?
         GROUP BY c.id
         ORDER BY total DESC
-    """, (month_str,)).fetchall()
+    """, (_yyyymm(year, month),)).fetchall()
     
     conn.close()
     return [dict(row) for row in rows]
@@ -578,39 +1677,126 @@ def get_yearly_summary(year):
     conn = get_connection()
     
     rows = conn.execute("""
-        SELECT substr(date, 5, 2) as month,
-               SUM(billed_amount) as total
-        FROM transactions
-        WHERE substr(date, 1, 4) = ?
-        GROUP BY month
-        ORDER BY month
-    """, (str(year),)).fetchall()
+        SELECT printf('%02d', yyyymm % 100) as month,
+               SUM(total) as total
+        FROM monthly_rollup
+        WHERE yyyymm BETWEEN ? AND ?
+        GROUP BY yyyymm
+        ORDER BY yyyymm
+    """, (_yyyymm(year, 1), _yyyymm(year, 12))).fetchall()
     
     conn.close()
     return [dict(row) for row in rows]
 
 
+def _shift_month(year, month, delta):
+    """연도+월을 delta개월 이동"""
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+# 리포트 비교 기준: 직전 기간 / 전년 동기
+REPORT_COMPARE_MODES = ('prev', 'yoy')
+
+
+def get_report(year, month, compare='prev', months=1):
+    """리포트 - 카테고리별 현재/비교 기간 지출, 증감, 비중과 해당 연도 월별 추이를 한 번의 쿼리로 계산
+    
+    현재 기간은 year/month로 끝나는 최근 months개월.
+    비교 기간은 compare='prev'면 바로 앞 months개월, 'yoy'면 1년 전 같은 기간.
+    """
+    if compare not in REPORT_COMPARE_MODES:
+        raise ValueError(f"지원하지 않는 비교 기준: {compare}")
+    if months < 1:
+        raise ValueError("기간은 1개월 이상이어야 합니다")
+    
+    current_start = _shift_month(year, month, -(months - 1))
+    offset = months if compare == 'prev' else 12
+    compare_start = _shift_month(*current_start, -offset)
+    compare_end = _shift_month(year, month, -offset)
+    
+    conn = get_connection()
+    rows = conn.execute("""
+        WITH by_category AS (
+            SELECT category_id,
+                   SUM(CASE WHEN yyyymm BETWEEN :cur_start AND :cur_end THEN count END) AS count,
+                   SUM(CASE WHEN yyyymm BETWEEN :cur_start AND :cur_end THEN total ELSE 0 END) AS current,
+                   SUM(CASE WHEN yyyymm BETWEEN :cmp_start AND :cmp_end THEN total ELSE 0 END) AS prev
+            FROM monthly_rollup
+            WHERE yyyymm BETWEEN :cur_start AND :cur_end
+               OR yyyymm BETWEEN :cmp_start AND :cmp_end
+            GROUP BY category_id
+        ),
+        by_month AS (
+            SELECT yyyymm, SUM(total) AS total
+            FROM monthly_rollup
+            WHERE yyyymm BETWEEN :year_start AND :year_end
+            GROUP BY yyyymm
+        )
+        SELECT 'category' AS kind,
+               c.id,
+               COALESCE(c.name, '미분류') AS name,
+               COALESCE(c.color, '#64748b') AS color,
+               b.count,
+               b.current,
+               b.prev,
+               b.current - b.prev AS diff,
+               CASE WHEN b.prev > 0 THEN (b.current - b.prev) * 100.0 / b.prev ELSE 0 END AS diff_percent,
+               CASE WHEN SUM(b.current) OVER () > 0
+                    THEN b.current * 100.0 / SUM(b.current) OVER () ELSE 0 END AS share,
+               SUM(b.current) OVER () AS current_total,
+               SUM(b.prev) OVER () AS prev_total
+        FROM by_category b
+        LEFT JOIN categories c ON c.id = b.category_id
+        UNION ALL
+        SELECT 'trend', yyyymm, printf('%02d', yyyymm % 100), NULL, NULL, total,
+               NULL, NULL, NULL, NULL, NULL, NULL
+        FROM by_month
+        ORDER BY kind, current DESC, id
+    """, {
+        'cur_start': _yyyymm(*current_start), 'cur_end': _yyyymm(year, month),
+        'cmp_start': _yyyymm(*compare_start), 'cmp_end': _yyyymm(*compare_end),
+        'year_start': _yyyymm(year, 1), 'year_end': _yyyymm(year, 12),
+    }).fetchall()
+    conn.close()
+    
+    categories = [dict(row) for row in rows if row['kind'] == 'category']
+    trend = sorted(
+        ({'month': row['name'], 'total': row['current']} for row in rows if row['kind'] == 'trend'),
+        key=lambda item: item['month']
+    )
+    current_total = categories[0]['current_total'] if categories else 0
+    prev_total = categories[0]['prev_total'] if categories else 0
+    for item in categories:
+        for key in ('kind', 'current_total', 'prev_total'):
+            item.pop(key)
+    
+    return {
+        'current_period': (current_start, (year, month)),
+        'compare_period': (compare_start, compare_end),
+        'categories': categories,
+        'current_total': current_total,
+        'prev_total': prev_total,
+        'total_diff': current_total - prev_total,
+        'total_diff_percent': (current_total - prev_total) / prev_total * 100 if prev_total > 0 else 0,
+        'trend': trend,
+    }
+
+
 def get_tag_summary(year=None, month=None):
     """태그별 지출 요약"""
     conn = get_connection()
     query = """
         SELECT tg.id, tg.name, tg.color,
-               COUNT(DISTINCT t.id) as count,
-               SUM(t.billed_amount) as total
-        FROM transaction_tags tt
-        JOIN tags tg ON tt.tag_id = tg.id
-        JOIN transactions t ON tt.transaction_id = t.id
+               SUM(r.count) as count,
+               SUM(r.total) as total
+        FROM monthly_tag_rollup r
+        JOIN tags tg ON r.tag_id = tg.id
         WHERE 1=1
     """
     params = []
     
-    if year:
-        query += " AND substr(t.date, 1, 4) = ?"
-        params.append(str(year))
-    if month:
-        query += " AND substr(t.date, 5, 2) = ?"
-        params.append(str(month).zfill(2))
-    
+    query = _add_period_filter(query, params, year, month, column='r.yyyymm')
     query += " GROUP BY tg.id ORDER BY total DESC"
     
     rows = conn.execute(query, params).fetchall()
@@ -0,0 +1,121 @@
+"""
+백그라운드 import 작업 모듈
+업로드된 명세서 파싱/저장을 스레드 풀에서 실행하고 진행 상황을 작업 ID로 조회
+같은 사용자 DB의 작업은 대기열에서 하나씩 차례로 실행 (동시에 저장하면 쓰기 잠금 대기로 실패함)
+"""
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import database as db
+
+# 동시에 실행하는 import 수 (서로 다른 사용자 DB끼리만 동시 실행, 나머지는 대기열)
+IMPORT_WORKERS = int(os.environ.get('IMPORT_WORKERS', 2))
+# 끝난 작업을 조회할 수 있도록 보관하는 시간(초)
+IMPORT_JOB_RETENTION = int(os.environ.get('IMPORT_JOB_RETENTION', 3600))
+
+FINISHED_STAGES = ('done', 'failed')
+
+_executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix='import')
+_jobs = {}  # job_id -> ImportJob
+_queues = {}  # DB 경로 -> 대기 중인 (작업, run, message) - 경로가 있으면 그 DB의 작업이 실행 중
+_lock = threading.Lock()
+
+
+class ImportJob:
+    """import 작업 진행 상황 (queued → parsing → saving → done/failed)"""
+    def __init__(self, owner_id, filenames):
+        self.id = uuid.uuid4().hex
+        self.owner_id = owner_id
+        self.filenames = filenames
+        self.stage = 'queued'
+        self.rows_parsed = 0
+        self.rows_written = 0
+        self.message = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def update(self, **fields):
+        """진행 상황 갱신 (작업 스레드에서 호출)"""
+        with _lock:
+            for key, value in fields.items():
+                setattr(self, key, value)
+
+    def to_dict(self):
+        with _lock:
+            return {
+                'id': self.id,
+                'filenames': self.filenames,
+                'stage': self.stage,
+                'rows_parsed': self.rows_parsed,
+                'rows_written': self.rows_written,
+                'message': self.message,
+                'error': self.error,
+                'finished': self.stage in FINISHED_STAGES,
+            }
+
+
+def submit(owner_id, db_path, filenames, run, message):
+    """run(progress)를 백그라운드에서 실행하는 작업 등록
+
+    run은 사용자 DB 경로가 설정된 상태로 실행되며 저장 건수를 반환.
+    message: 저장 건수 → 완료 메시지
+    """
+    _prune()
+    job = ImportJob(owner_id, filenames)
+    with _lock:
+        _jobs[job.id] = job
+        queue = _queues.get(db_path)
+        start = queue is None
+        if start:
+            queue = _queues[db_path] = deque()
+        queue.append((job, run, message))
+    if start:
+        _executor.submit(_drain, db_path)
+    return job
+
+
+def _drain(db_path):
+    """DB 하나의 대기열을 빌 때까지 차례로 실행"""
+    while True:
+        with _lock:
+            queue = _queues[db_path]
+            if not queue:
+                del _queues[db_path]
+                return
+            job, run, message = queue.popleft()
+        _run(job, db_path, run, message)
+
+
+def _run(job, db_path, run, message):
+    try:
+        with db.use_db_path(db_path):
+            job.update(stage='parsing')
+            count = run(job.update)
+        job.update(stage='done', rows_written=count, message=message(count), finished_at=time.time())
+    except Exception as e:
+        print(f"Import 실패 ({', '.join(job.filenames)}): {e}")
+        job.update(stage='failed', error=str(e), finished_at=time.time())
+
+
+def get_job(job_id, owner_id):
+    """작업 조회 (다른 사용자의 작업이면 None)"""
+    with _lock:
+        job = _jobs.get(job_id)
+    if job is None or job.owner_id != owner_id:
+        return None
+    return job
+
+
+def _prune():
+    """보관 시간이 지난 완료 작업 제거"""
+    cutoff = time.time() - IMPORT_JOB_RETENTION
+    with _lock:
+        expired = [job_id for job_id, job in _jobs.items()
+                   if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del _jobs[job_id]
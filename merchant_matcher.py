@@ -0,0 +1,75 @@
+"""
+가맹점 분류 규칙 매처
+Aho-Corasick 오토마톤으로 가맹점명에 포함된 규칙 패턴을 한 번에 탐색
+"""
+import string
+from collections import deque
+
+# SQLite LIKE와 동일하게 ASCII 문자만 대소문자 구분 없이 비교
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def fold_case(text):
+    """ASCII 대문자만 소문자로 변환"""
+    return text.translate(_ASCII_LOWER)
+
+
+class MerchantMatcher:
+    """규칙 패턴 목록으로 만든 부분 문자열 매처
+
+    가맹점명에 포함된 패턴 중 가장 긴 패턴의 값을 반환 (길이가 같으면 먼저 등록된 규칙).
+    SQL의 `merchant LIKE '%' || pattern || '%' ORDER BY LENGTH(pattern) DESC`와 같은 결과.
+    """
+    def __init__(self, rules):
+        """rules: (패턴, 값) 목록"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [None]  # 노드에서 끝나는 패턴 중 최우선 (길이, -순서, 값)
+
+        for order, (pattern, value) in enumerate(rules):
+            node = 0
+            for ch in fold_case(pattern):
+                next_node = self._goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][ch] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                node = next_node
+            candidate = (len(pattern), -order, value)
+            if self._best[node] is None or candidate[:2] > self._best[node][:2]:
+                self._best[node] = candidate
+
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        """BFS로 실패 링크 생성 후, 실패 링크를 따라 도달하는 패턴까지 최우선 값에 반영"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            fail_best = self._best[self._fail[node]]
+            if fail_best is not None and (self._best[node] is None or fail_best[:2] > self._best[node][:2]):
+                self._best[node] = fail_best
+
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                queue.append(child)
+
+    def match(self, merchant):
+        """가맹점명에 포함된 최우선 규칙의 값 반환 (없으면 None)"""
+        if merchant is None:
+            return None
+        best = self._best[0]
+        node = 0
+        for ch in fold_case(merchant):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            candidate = self._best[node]
+            if candidate is not None and (best is None or candidate[:2] > best[:2]):
+                best = candidate
+        return best[2] if best else None
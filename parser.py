@@ -2,11 +2,39 @@
 Excel 파서 모듈
 삼성카드 명세서 Excel/CSV 파일 파싱
 """
+import codecs
+import contextlib
+import csv
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import uuid
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 import re
+from openpyxl import load_workbook
 import database as db
 
+# 스트리밍 import 시 한 번에 파싱/저장하는 행 수
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 5000))
+
+# 여러 파일/시트 동시 파싱 프로세스 수
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', min(4, os.cpu_count() or 1)))
+
+SUPPORTED_SUFFIXES = ('.xlsx', '.xls', '.csv')
+
+# 파싱 결과 캐시 형식 버전 (파서 출력이 바뀌면 올려서 기존 캐시 무시)
+PARSE_CACHE_VERSION = 1
+# 캐시에 저장하는 거래 필드 (category_id는 저장할 때마다 규칙으로 다시 지정)
+_CACHE_FIELDS = ('date', 'receipt_date', 'merchant', 'business_type', 'country', 'local_amount',
+                 'currency', 'usd_amount', 'exchange_rate', 'krw_amount', 'fee', 'billed_amount',
+                 'is_overseas')
+
 
 def clean_amount(value):
     """금액 문자열을 숫자로 변환"""
@@ -34,10 +62,107 @@ def parse_date(value):
     return None
 
 
+# ============ 열 단위 변환 ============
+# clean_amount()/parse_date()와 같은 결과를 셀 하나씩이 아니라 열 전체에 한 번에 적용
+
+def _to_text(series):
+    """셀 값을 str()로 변환한 열 (빈 셀은 NaN 유지)"""
+    return series.astype(str).where(series.notna())
+
+
+def _clean_text(series, default):
+    """str(값).strip() 열 변환 - 빈 셀은 default"""
+    return _to_text(series).str.strip().astype(object).where(series.notna(), default)
+
+
+def parse_dates(series):
+    """parse_date()의 열 단위 버전 - 숫자만 남겨 8자리 이상이면 앞 8자리, 아니면 None"""
+    digits = _to_text(series)
+    # 이미 숫자로만 된 값(20250105 등)은 정규식 생략
+    mixed = digits.notna() & ~digits.str.isdecimal().astype(bool)
+    if mixed.any():
+        digits[mixed] = digits[mixed].str.replace(r'\D', '', regex=True)
+    return digits.str[:8].astype(object).where(digits.str.len() >= 8, None)
+
+
+def _float_strings(strings):
+    """숫자 문자열 → float (clean_amount()와 같은 결과), 변환할 수 없으면 0"""
+    # object 배열의 astype(float)은 셀마다 float()를 호출하므로 결과가 같음
+    # (pd.to_numeric은 자릿수가 긴 소수를 다르게 반올림해서 사용하지 않음)
+    try:
+        return strings.to_numpy(dtype=object).astype(float)  # 콤마가 없는 열은 바로 변환
+    except ValueError:
+        pass
+    cleaned = strings.str.replace(',', '', regex=False).str.replace(' ', '', regex=False)
+    try:
+        return cleaned.to_numpy(dtype=object).astype(float)
+    except ValueError:
+        return cleaned.map(clean_amount).to_numpy(dtype=float)
+
+
+def clean_amounts(series):
+    """clean_amount()의 열 단위 버전 (float 열)"""
+    if series.dtype.kind in 'biuf':
+        return series.astype(float).fillna(0.0)
+    
+    result = pd.Series(0.0, index=series.index, name=series.name)
+    present = series.notna()
+    try:
+        is_text = series.str.len().notna()  # 문자열이 아닌 셀은 NaN
+    except AttributeError:  # 문자열 셀이 하나도 없는 열
+        is_text = pd.Series(False, index=series.index)
+    
+    # 숫자 셀은 float(값), 문자열은 콤마/공백 제거 후 변환
+    numbers = series[present & ~is_text]
+    if len(numbers):
+        try:
+            result[numbers.index] = numbers.to_numpy(dtype=float)
+        except (TypeError, ValueError):
+            result[numbers.index] = numbers.map(clean_amount).astype(float)
+    
+    texts = series[is_text]
+    if len(texts):
+        result[texts.index] = _float_strings(texts)
+    return result
+
+
+def _to_ints(*amounts):
+    """int(금액) 열 변환 (0 방향 절삭) - 열마다 파이썬 int 목록 반환
+    
+    'nan'/'inf'처럼 정수로 바꿀 수 없는 금액이 있으면 행 순서상 첫 셀을 알려주는 ValueError.
+    """
+    values = np.column_stack([a.to_numpy(dtype=float) for a in amounts])
+    bad = np.argwhere(~np.isfinite(values))  # (행, 열) 행 순서
+    if len(bad):
+        row, col = bad[0]
+        amount = amounts[col]
+        raise ValueError(f"금액을 정수로 변환할 수 없습니다: {values[row, col]} "
+                         f"(행 {amount.index[row] + 1}, 열 {amount.name + 1})")
+    if values.size and np.abs(values).max() >= 2 ** 63:
+        return [[int(v) for v in col] for col in values.T.tolist()]  # int64 범위 밖은 파이썬 int로
+    return np.trunc(values).astype(np.int64).T.tolist()
+
+
+def _row_texts(df, rows):
+    """첫 rows행의 셀 문자열을 공백으로 이은 행별 텍스트 (빈 셀은 빈 문자열)"""
+    head = df.head(rows)
+    if head.empty:
+        return pd.Series([], dtype=object)
+    text = head.astype(str).where(head.notna(), '')
+    return text.iloc[:, 0].str.cat([text.iloc[:, i] for i in range(1, text.shape[1])], sep=' ')
+
+
+def _contains_any(texts, keywords):
+    """행 텍스트별로 키워드 중 하나라도 포함하는지"""
+    mask = pd.Series(False, index=texts.index)
+    for kw in keywords:
+        mask |= texts.str.contains(kw, regex=False)
+    return mask
+
+
 def detect_sheet_type(df, sheet_name=''):
     """시트 유형 감지 (해외/국내/요약)"""
     # 시트 이름으로 먼저 판단
-    sheet_name_lower = sheet_name.lower() if sheet_name else ''
     if '해외' in sheet_name:
         return 'overseas'
     if '일시불' in sheet_name or '할부' in sheet_name:
@@ -45,45 +170,40 @@ def detect_sheet_type(df, sheet_name=''):
     if '청구요약' in sheet_name or '요약' in sheet_name:
         return 'summary'
     
-    # 첫 10행 내에서 키워드 검색
-    for i in range(min(10, len(df))):
-        row_text = ' '.join([str(x) for x in df.iloc[i].tolist() if pd.notna(x)])
-        if '해외이용' in row_text or '해외매출' in row_text:
-            return 'overseas'
-        if '국내이용' in row_text or '국내매출' in row_text or '일시불' in row_text or '할부' in row_text:
-            return 'domestic'
-        if '청구요약' in row_text or '결제예정' in row_text:
-            return 'summary'
+    # 첫 10행 내에서 키워드 검색 (같은 행에서는 해외 > 국내 > 요약 순)
+    texts = _row_texts(df, 10)
+    matches = [
+        ('overseas', _contains_any(texts, ['해외이용', '해외매출'])),
+        ('domestic', _contains_any(texts, ['국내이용', '국내매출', '일시불', '할부'])),
+        ('summary', _contains_any(texts, ['청구요약', '결제예정'])),
+    ]
+    for i in range(len(texts)):
+        for sheet_type, mask in matches:
+            if mask.iloc[i]:
+                return sheet_type
     return 'unknown'
 
 
 def find_header_row(df, keywords):
     """헤더 행 찾기"""
-    for i in range(min(20, len(df))):
-        row_text = ' '.join([str(x) for x in df.iloc[i].tolist() if pd.notna(x)])
-        if any(kw in row_text for kw in keywords):
-            return i
+    mask = _contains_any(_row_texts(df, 20), keywords)
+    if mask.any():
+        return int(np.argmax(mask.to_numpy()))
     return None
 
 
 def is_installment_sheet(df):
     """할부 시트인지 확인"""
-    for i in range(min(5, len(df))):
-        row_text = ' '.join([str(x) for x in df.iloc[i].tolist() if pd.notna(x)])
-        if '할부' in row_text:
-            return True
-    return False
+    return bool(_contains_any(_row_texts(df, 5), ['할부']).any())
 
 
-def parse_overseas_sheet(df):
-    """해외이용 시트 파싱"""
-    transactions = []
-    
+def _overseas_columns(df):
+    """해외 시트 앞부분에서 (헤더 행, 컬럼 매핑) 찾기 - 헤더가 없으면 None"""
     # 헤더 행 찾기
     header_row = find_header_row(df, ['이용일', '가맹점', '접수일'])
     if header_row is None:
         print("해외이용 헤더를 찾을 수 없습니다.")
-        return transactions
+        return None
     
     # 헤더 설정
     headers = df.iloc[header_row].tolist()
@@ -117,62 +237,93 @@ def parse_overseas_sheet(df):
         elif '청구금액' in h_str or '청구' in h_str:
             col_map['billed_amount'] = idx
     
-    # 데이터 행 파싱
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i].tolist()
-        
-        # 빈 행이나 합계 행 스킵
-        date_val = row[col_map.get('date', 0)] if 'date' in col_map else None
-        merchant_val = row[col_map.get('merchant', 2)] if 'merchant' in col_map else None
-        
-        if pd.isna(date_val) or not parse_date(date_val):
-            # 합계 행인지 확인
-            if pd.notna(merchant_val) and '합계' in str(merchant_val):
-                continue
-            continue
-        
-        tx = {
-            'date': parse_date(row[col_map.get('date', 0)]),
-            'receipt_date': parse_date(row[col_map.get('receipt_date', 1)]),
-            'merchant': str(row[col_map.get('merchant', 2)]).strip() if pd.notna(row[col_map.get('merchant', 2)]) else '',
-            'business_type': str(row[col_map.get('business_type', 3)]).strip() if 'business_type' in col_map and pd.notna(row[col_map['business_type']]) else None,
-            'country': str(row[col_map.get('country', 4)]).strip() if 'country' in col_map and pd.notna(row[col_map['country']]) else None,
-            'local_amount': clean_amount(row[col_map['local_amount']]) if 'local_amount' in col_map else None,
-            'currency': str(row[col_map['currency']]).strip() if 'currency' in col_map and pd.notna(row[col_map['currency']]) else 'USD',
-            'usd_amount': clean_amount(row[col_map['usd_amount']]) if 'usd_amount' in col_map else None,
-            'exchange_rate': clean_amount(row[col_map['exchange_rate']]) if 'exchange_rate' in col_map else None,
-            'krw_amount': int(clean_amount(row[col_map['krw_amount']])) if 'krw_amount' in col_map else 0,
-            'fee': int(clean_amount(row[col_map['fee']])) if 'fee' in col_map else 0,
-            'billed_amount': 0,  # 아래에서 설정
-            'is_overseas': 1,
-            'category_id': None,
-        }
-        
-        # 해외거래는 원화환산 금액을 사용 (청구금액 대신)
-        tx['billed_amount'] = tx['krw_amount']
-        
-        # 유효한 거래만 추가
-        if tx['merchant'] and tx['billed_amount'] > 0:
-            # 가맹점 기반 자동 카테고리 지정
-            auto_cat = db.get_category_by_merchant(tx['merchant'])
-            if auto_cat:
-                tx['category_id'] = auto_cat['id']
-            
-            transactions.append(tx)
+    return header_row, col_map
+
+
+def _parse_overseas_rows(data, col_map):
+    """헤더 아래 데이터 행(DataFrame)을 해외 거래 목록으로 변환"""
+    transactions = []
+    if 'date' not in col_map:
+        return transactions
+    
+    # 날짜가 있는 행만 (빈 행/합계 행 제외)
+    dates = parse_dates(data.iloc[:, col_map['date']])
+    data = data[dates.notna()]
+    if data.empty:
+        return transactions
+    
+    def column(key, default=None):
+        idx = col_map.get(key, default)
+        return None if idx is None else data.iloc[:, idx]
+    
+    def amounts(key):
+        return clean_amounts(column(key)) if key in col_map else None
+    
+    n = len(data)
+    merchants = _clean_text(column('merchant', 2), '').tolist()
+    local_amounts = amounts('local_amount')
+    usd_amounts = amounts('usd_amount')
+    exchange_rates = amounts('exchange_rate')
+    int_keys = [key for key in ('krw_amount', 'fee') if key in col_map]
+    int_amounts = dict(zip(int_keys, _to_ints(*[amounts(key) for key in int_keys]))) if int_keys else {}
+    krw_amounts = int_amounts.get('krw_amount', [0] * n)
+    fees = int_amounts.get('fee', [0] * n)
+    
+    columns = zip(
+        dates[data.index].tolist(),
+        parse_dates(column('receipt_date', 1)).tolist(),
+        merchants,
+        _clean_text(column('business_type'), None).tolist() if 'business_type' in col_map else [None] * n,
+        _clean_text(column('country'), None).tolist() if 'country' in col_map else [None] * n,
+        local_amounts.tolist() if local_amounts is not None else [None] * n,
+        _clean_text(column('currency'), 'USD').tolist() if 'currency' in col_map else ['USD'] * n,
+        usd_amounts.tolist() if usd_amounts is not None else [None] * n,
+        exchange_rates.tolist() if exchange_rates is not None else [None] * n,
+        krw_amounts,
+        fees,
+    )
+    for (date, receipt_date, merchant, business_type, country, local_amount,
+         currency, usd_amount, exchange_rate, krw_amount, fee) in columns:
+        # 해외거래는 원화환산 금액을 사용 (청구금액 대신), 유효한 거래만 추가
+        if merchant and krw_amount > 0:
+            transactions.append({
+                'date': date,
+                'receipt_date': receipt_date,
+                'merchant': merchant,
+                'business_type': business_type,
+                'country': country,
+                'local_amount': local_amount,
+                'currency': currency,
+                'usd_amount': usd_amount,
+                'exchange_rate': exchange_rate,
+                'krw_amount': krw_amount,
+                'fee': fee,
+                'billed_amount': krw_amount,
+                'is_overseas': 1,
+                'category_id': None,
+            })
     
     return transactions
 
 
-def parse_domestic_sheet(df, sheet_name=''):
-    """국내이용/일시불/할부 시트 파싱"""
-    transactions = []
+def parse_overseas_sheet(df):
+    """해외이용 시트 파싱"""
+    columns = _overseas_columns(df)
+    if columns is None:
+        return []
+    header_row, col_map = columns
+    return _parse_overseas_rows(df.iloc[header_row + 1:], col_map)
+
+
+def _domestic_columns(df, sheet_name=''):
+    """국내 시트 앞부분에서 (헤더 행, 컬럼 매핑, 할부 여부) 찾기 - 헤더가 없으면 None"""
     is_halbu = is_installment_sheet(df) or '할부' in sheet_name
     
     # 헤더 행 찾기 - 다양한 키워드 지원
     header_row = find_header_row(df, ['이용일', '가맹점', '이용금액', '원금'])
     if header_row is None:
         print("국내이용 헤더를 찾을 수 없습니다.")
-        return transactions
+        return None
     
     headers = df.iloc[header_row].tolist()
     print(f"  발견된 헤더: {headers}")
@@ -195,61 +346,68 @@ def parse_domestic_sheet(df, sheet_name=''):
             col_map['installment'] = idx
     
     print(f"  컬럼 매핑: {col_map}")
+    return header_row, col_map, is_halbu
+
+
+def _parse_domestic_rows(data, col_map, is_halbu):
+    """헤더 아래 데이터 행(DataFrame)을 국내 거래 목록으로 변환"""
+    transactions = []
+    if 'date' not in col_map:
+        return transactions
     
-    for i in range(header_row + 1, len(df)):
-        row = df.iloc[i].tolist()
-        
-        date_val = row[col_map.get('date', 0)] if 'date' in col_map else None
-        if pd.isna(date_val) or not parse_date(date_val):
-            continue
-        
-        # 금액 파싱 - 할부는 원금, 일시불은 이용금액
-        if is_halbu and 'principal' in col_map:
-            raw_amount = row[col_map['principal']]
-        elif 'amount' in col_map:
-            raw_amount = row[col_map['amount']]
-        else:
-            raw_amount = 0
-        
-        amount = int(clean_amount(raw_amount))
-        
-        # 가맹점명 파싱 - 여러 컬럼 위치 시도
-        merchant = ''
-        if 'merchant' in col_map and pd.notna(row[col_map['merchant']]):
-            merchant = str(row[col_map['merchant']]).strip()
-        
-        # 업종 파싱
-        business_type = None
-        if 'business_type' in col_map and pd.notna(row[col_map['business_type']]):
-            business_type = str(row[col_map['business_type']]).strip()
-        
-        tx = {
-            'date': parse_date(date_val),
-            'receipt_date': None,
-            'merchant': merchant,
-            'business_type': business_type,
-            'country': None,
-            'local_amount': None,
-            'currency': 'KRW',
-            'usd_amount': None,
-            'exchange_rate': None,
-            'krw_amount': amount,
-            'fee': 0,
-            'billed_amount': amount,
-            'is_overseas': 0,
-            'category_id': None,
-        }
-        
+    # 날짜가 있는 행만
+    dates = parse_dates(data.iloc[:, col_map['date']])
+    data = data[dates.notna()]
+    if data.empty:
+        return transactions
+    n = len(data)
+    
+    # 금액 파싱 - 할부는 원금, 일시불은 이용금액
+    if is_halbu and 'principal' in col_map:
+        amounts, = _to_ints(clean_amounts(data.iloc[:, col_map['principal']]))
+    elif 'amount' in col_map:
+        amounts, = _to_ints(clean_amounts(data.iloc[:, col_map['amount']]))
+    else:
+        amounts = [0] * n
+    
+    merchants = (_clean_text(data.iloc[:, col_map['merchant']], '').tolist()
+                 if 'merchant' in col_map else [''] * n)
+    business_types = (_clean_text(data.iloc[:, col_map['business_type']], None).tolist()
+                      if 'business_type' in col_map else [None] * n)
+    
+    for date, merchant, business_type, amount in zip(
+            dates[data.index].tolist(), merchants, business_types, amounts):
         # 가맹점명이 있고 금액이 있는 거래만 (취소거래는 음수도 허용)
-        if tx['merchant'] and tx['billed_amount'] != 0:
-            auto_cat = db.get_category_by_merchant(tx['merchant'])
-            if auto_cat:
-                tx['category_id'] = auto_cat['id']
-            transactions.append(tx)
+        if merchant and amount != 0:
+            transactions.append({
+                'date': date,
+                'receipt_date': None,
+                'merchant': merchant,
+                'business_type': business_type,
+                'country': None,
+                'local_amount': None,
+                'currency': 'KRW',
+                'usd_amount': None,
+                'exchange_rate': None,
+                'krw_amount': amount,
+                'fee': 0,
+                'billed_amount': amount,
+                'is_overseas': 0,
+                'category_id': None,
+            })
     
     return transactions
 
 
+def parse_domestic_sheet(df, sheet_name=''):
+    """국내이용/일시불/할부 시트 파싱"""
+    columns = _domestic_columns(df, sheet_name)
+    if columns is None:
+        return []
+    header_row, col_map, is_halbu = columns
+    return _parse_domestic_rows(df.iloc[header_row + 1:], col_map, is_halbu)
+
+
 def parse_excel_file(file_path):
     """Excel 파일 전체 파싱"""
     file_path = Path(file_path)
@@ -263,81 +421,400 @@ def parse_excel_file(file_path):
     xls = pd.ExcelFile(file_path)
     
     for sheet_name in xls.sheet_names:
-        print(f"시트 파싱 중: {sheet_name}")
-        df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
-        
-        sheet_type = detect_sheet_type(df, sheet_name)
-        print(f"  시트 유형: {sheet_type}")
-        
-        # 해외이용 시트는 제외
-        if sheet_type == 'overseas':
-            print(f"  스킵 (해외결제 제외)")
-            continue
-        elif sheet_type == 'domestic':
-            txs = parse_domestic_sheet(df, sheet_name)
-            all_transactions.extend(txs)
-            print(f"  국내 거래 {len(txs)}건 파싱됨")
-        else:
-            print(f"  스킵 (요약 또는 미지원 시트)")
+        all_transactions.extend(_parse_excel_sheet(xls, sheet_name))
     
     return all_transactions
 
 
-def parse_csv_file(file_path):
-    """CSV 파일 파싱 (단일 시트)"""
-    df = pd.read_csv(file_path, header=None, encoding='utf-8')
+def _parse_excel_sheet(xls, sheet_name):
+    """Excel 시트 하나 파싱 (국내 시트만, 나머지는 빈 목록)"""
+    print(f"시트 파싱 중: {sheet_name}")
+    df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
     
-    sheet_type = detect_sheet_type(df)
+    sheet_type = detect_sheet_type(df, sheet_name)
+    print(f"  시트 유형: {sheet_type}")
     
+    # 해외이용 시트는 제외
     if sheet_type == 'overseas':
-        return parse_overseas_sheet(df)
+        print(f"  스킵 (해외결제 제외)")
+        return []
     elif sheet_type == 'domestic':
-        return parse_domestic_sheet(df)
+        txs = parse_domestic_sheet(df, sheet_name)
+        print(f"  국내 거래 {len(txs)}건 파싱됨")
+        return txs
     else:
+        print(f"  스킵 (요약 또는 미지원 시트)")
         return []
 
 
-def import_file(file_path):
-    """파일 import 및 DB 저장 (동일 월 기존 데이터 삭제 후 저장)"""
+# ============ 스트리밍 Excel 읽기 ============
+
+def _cell_value(value):
+    """openpyxl 셀 값을 pd.read_excel과 같은 형태로 변환 (정수 실수 → int, 빈 문자열 → None)"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if value == '':
+        return None
+    return value
+
+
+def _sheet_rows(worksheet):
+    """시트의 행을 하나씩 읽기 (read_only 모드에서는 필요한 행만 메모리에 올라감)"""
+    for row in worksheet.iter_rows(values_only=True):
+        yield [_cell_value(value) for value in row]
+
+
+def _rows_frame(rows, width, start=0):
+    """행 목록 → 열 개수가 width 이상인 DataFrame (인덱스는 시트의 행 번호 start부터)"""
+    df = pd.DataFrame(rows, index=range(start, start + len(rows)))
+    if df.shape[1] < width:
+        df = df.reindex(columns=range(width))
+    return df
+
+
+def _batched_transactions(pending, rows, width, parse_rows, batch_size, start):
+    """헤더 아래 행을 batch_size행씩 DataFrame으로 묶어 parse_rows로 변환 (빈 묶음은 생략)
+    
+    start: pending 첫 행의 시트 행 번호 (0부터) - 묶음 DataFrame의 인덱스가 시트 행 번호와 같도록
+    """
+    while True:
+        pending.extend(islice(rows, max(batch_size - len(pending), 0)))
+        if not pending:
+            return
+        txs = parse_rows(_rows_frame(pending, width, start))
+        if txs:
+            yield txs
+        start += len(pending)
+        pending = []
+
+
+def iter_excel_batches(file_path, batch_size=IMPORT_BATCH_SIZE):
+    """Excel 파일을 시트 단위로 스트리밍 파싱해 거래를 batch_size행씩 묶어 반환
+    
+    시트 유형은 시트 이름과 앞 20행만 보고 판단하며, 국내 시트가 아니면 나머지 행은 읽지 않음.
+    """
     file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
     
-    if file_path.suffix.lower() in ['.xlsx', '.xls']:
-        transactions = parse_excel_file(file_path)
-    elif file_path.suffix.lower() == '.csv':
-        transactions = parse_csv_file(file_path)
-    else:
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            sheet_name = worksheet.title
+            print(f"시트 파싱 중: {sheet_name}")
+            rows = _sheet_rows(worksheet)
+            head = list(islice(rows, 20))  # find_header_row가 보는 범위
+            head_df = pd.DataFrame(head)
+            
+            sheet_type = detect_sheet_type(head_df, sheet_name)
+            print(f"  시트 유형: {sheet_type}")
+            if sheet_type == 'overseas':
+                print(f"  스킵 (해외결제 제외)")
+                continue
+            elif sheet_type != 'domestic':
+                print(f"  스킵 (요약 또는 미지원 시트)")
+                continue
+            
+            columns = _domestic_columns(head_df, sheet_name)
+            if columns is None:
+                continue
+            header_row, col_map, is_halbu = columns
+            width = max(col_map.values(), default=-1) + 1
+            
+            count = 0
+            for txs in _batched_transactions(
+                    head[header_row + 1:], rows, width,
+                    lambda data: _parse_domestic_rows(data, col_map, is_halbu), batch_size,
+                    header_row + 1):
+                count += len(txs)
+                yield txs
+            print(f"  국내 거래 {count}건 파싱됨")
+    finally:
+        workbook.close()
+
+
+# ============ 스트리밍 CSV 읽기 ============
+
+def _sniff_encoding(file_path, sample_size=65536):
+    """CSV 인코딩 추정 - BOM이 있으면 utf-8-sig, 앞부분이 UTF-8로 읽히면 utf-8, 아니면 cp949"""
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # 샘플 끝에서 잘린 멀티바이트 문자는 오류로 보지 않음
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp949'  # 카드사 CSV의 EUC-KR 확장
+
+
+def _csv_rows(file_path, encoding):
+    """CSV 행을 하나씩 읽기 (빈 줄 제외, 빈 칸은 None)"""
+    with open(file_path, newline='', encoding=encoding) as f:
+        for row in csv.reader(f):
+            if not row:
+                continue
+            if '' in row:
+                row = [value if value != '' else None for value in row]
+            yield row
+
+
+def iter_csv_batches(file_path, batch_size=IMPORT_BATCH_SIZE):
+    """CSV 파일을 스트리밍 파싱해 거래를 batch_size행씩 묶어 반환 (국내/해외 자동 감지)"""
+    rows = _csv_rows(file_path, _sniff_encoding(file_path))
+    try:
+        head = list(islice(rows, 20))  # find_header_row가 보는 범위
+        head_df = pd.DataFrame(head)
+        
+        sheet_type = detect_sheet_type(head_df)
+        if sheet_type == 'overseas':
+            columns = _overseas_columns(head_df)
+            if columns is None:
+                return
+            header_row, col_map = columns
+            width = max([*col_map.values(), 2]) + 1  # 접수일/가맹점 기본 위치 포함
+            parse_rows = lambda data: _parse_overseas_rows(data, col_map)
+        elif sheet_type == 'domestic':
+            columns = _domestic_columns(head_df)
+            if columns is None:
+                return
+            header_row, col_map, is_halbu = columns
+            width = max(col_map.values(), default=-1) + 1
+            parse_rows = lambda data: _parse_domestic_rows(data, col_map, is_halbu)
+        else:
+            return
+        
+        yield from _batched_transactions(head[header_row + 1:], rows, width, parse_rows, batch_size,
+                                         header_row + 1)
+    finally:
+        rows.close()
+
+
+def parse_csv_file(file_path):
+    """CSV 파일 파싱 (단일 시트)"""
+    return [tx for batch in iter_csv_batches(file_path) for tx in batch]
+
+
+# ============ 병렬 파싱 ============
+
+def _check_suffix(file_path):
+    if file_path.suffix.lower() not in SUPPORTED_SUFFIXES:
         raise ValueError(f"지원하지 않는 파일 형식: {file_path.suffix}")
+
+
+def _sheet_jobs(file_path):
+    """파일을 (파일 경로, 시트 이름) 파싱 작업으로 나누기 - CSV는 시트 이름 None 하나"""
+    if file_path.suffix.lower() == '.csv':
+        return [(str(file_path), None)]
+    if not file_path.exists():
+        raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
+    with pd.ExcelFile(file_path) as xls:
+        return [(str(file_path), sheet_name) for sheet_name in xls.sheet_names]
+
+
+def _parse_job(job):
+    """파싱 작업 하나 실행 (워커 프로세스에서 호출) - (거래 목록, 출력 로그) 반환"""
+    file_path, sheet_name = job
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        if sheet_name is None:
+            txs = parse_csv_file(file_path)
+        else:
+            txs = _parse_excel_sheet(file_path, sheet_name)
+    return txs, log.getvalue()
+
+
+def parse_files_parallel(file_paths, workers=PARSE_WORKERS):
+    """여러 파일의 시트를 프로세스 풀에 나눠 파싱해 파일별 거래 목록 반환
+    
+    결과는 작업 완료 순서와 상관없이 입력 파일 순서, 파일 안에서는 시트 순서로 모임.
+    """
+    file_paths = [Path(path) for path in file_paths]
+    for file_path in file_paths:
+        _check_suffix(file_path)
+    # (파일 순번, 파싱 작업) 목록
+    jobs = [(index, job) for index, file_path in enumerate(file_paths) for job in _sheet_jobs(file_path)]
+    
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        results = [_parse_job(job) for _, job in jobs]
+    else:
+        # 멀티스레드 서버에서 fork하지 않도록 spawn으로 워커 생성
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            results = list(pool.map(_parse_job, [job for _, job in jobs]))
     
-    # 파싱된 거래에서 연도+월 추출 (중복 제거)
-    months_in_file = set()
+    # 워커 로그도 작업 순서대로 출력하고 파일별로 모으기
+    per_file = [[] for _ in file_paths]
+    for (index, _), (txs, log) in zip(jobs, results):
+        print(log, end='')
+        per_file[index].extend(txs)
+    return per_file
+
+
+# ============ 파싱 결과 캐시 ============
+# 업로드 파일과 같은 폴더에 <내용 해시>.parsed.v<버전>.jsonl.gz로 저장
+# (첫 줄은 필드 이름, 이후 거래마다 값 배열 한 줄)
+# 해시가 없는 import도 같은 형식의 임시 파일에 파싱 결과를 모은 뒤 저장
+
+def _parse_cache_path(file_path, sha256):
+    return Path(file_path).parent / f"{sha256}.parsed.v{PARSE_CACHE_VERSION}.jsonl.gz"
+
+
+def _write_parse_cache(batches, cache_path, progress=None):
+    """거래 묶음을 끝까지 읽어 캐시 파일에 기록 (파싱이 끝난 경우에만 파일 확정) - 기록한 거래 수 반환
+    
+    progress: 묶음마다 progress(지금까지 기록한 건수) 호출
+    """
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{uuid.uuid4().hex}.tmp")
+    count = 0
+    try:
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps(_CACHE_FIELDS) + '\n')
+            for batch in batches:
+                for tx in batch:
+                    f.write(json.dumps([tx[key] for key in _CACHE_FIELDS], ensure_ascii=False) + '\n')
+                count += len(batch)
+                if progress:
+                    progress(count)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return count
+
+
+def _read_parse_cache(cache_path, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """캐시 파일의 거래를 batch_size건씩 묶어 반환
+    
+    progress: 묶음마다 progress(지금까지 읽은 건수) 호출
+    """
+    with gzip.open(cache_path, 'rt', encoding='utf-8') as f:
+        fields = json.loads(next(f))
+        count = 0
+        batch = []
+        for line in f:
+            tx = dict(zip(fields, json.loads(line)))
+            tx['category_id'] = None
+            batch.append(tx)
+            if len(batch) >= batch_size:
+                count += len(batch)
+                if progress:
+                    progress(count)
+                yield batch
+                batch = []
+        if batch:
+            count += len(batch)
+            if progress:
+                progress(count)
+            yield batch
+
+
+def apply_auto_categories(transactions):
+    """가맹점 분류 규칙으로 카테고리 일괄 지정 (규칙 매처 한 번 조회)"""
+    categories = db.classify_merchants(tx['merchant'] for tx in transactions)
     for tx in transactions:
-        if tx.get('date') and len(tx['date']) >= 6:
-            year = int(tx['date'][:4])
-            month = int(tx['date'][4:6])
-            months_in_file.add((year, month))
+        category = categories[tx['merchant']]
+        if category:
+            tx['category_id'] = category['id']
+    return transactions
+
+
+def _save_batches(batches, progress=None):
+    """파싱이 끝난 거래 묶음에 자동 카테고리를 지정해 저장 (해당 월의 기존 거래 삭제 + 저장을 한 트랜잭션으로)
+    
+    batches는 쓰기 트랜잭션 안에서 읽히므로 파싱 중인 제너레이터가 아니라
+    파싱 결과 파일이나 목록이어야 함 (파싱하는 동안 다른 요청의 쓰기가 막히지 않도록).
+    progress: 진행 상황 콜백 - progress(stage=..., rows_parsed=..., rows_written=...) 형태로 호출
+    Returns: 저장 건수
+    """
+    report = progress or (lambda **fields: None)
+    report(stage='saving')
     
-    # 해당 월의 기존 거래 삭제
-    deleted_total = 0
-    for year, month in months_in_file:
-        deleted = db.delete_transactions_by_month(year, month)
-        deleted_total += deleted
+    # 가맹점 기반 자동 카테고리 지정
+    deleted_total, imported_count, skipped = db.replace_transaction_batches(
+        (apply_auto_categories(batch) for batch in batches),
+        progress=lambda written: report(rows_written=written)
+    )
     
     if deleted_total > 0:
         print(f"기존 {deleted_total}건 삭제됨")
+    if skipped > 0:
+        print(f"필수 값이 없는 {skipped}건 건너뜀")
+    return imported_count
+
+
+def import_file(file_path, progress=None, sha256=None):
+    """파일 import 및 DB 저장 (동일 월 기존 데이터 삭제 후 저장)
     
-    # DB에 저장
-    imported_count = 0
-    for tx in transactions:
-        try:
-            db.add_transaction(tx)
-            imported_count += 1
-        except Exception as e:
-            print(f"거래 저장 실패: {e}")
+    sha256(파일 내용 해시)이 있으면 파싱 결과 캐시를 사용 - 같은 파일을 다시 가져올 때 파싱 생략.
+    """
+    file_path = Path(file_path)
+    _check_suffix(file_path)
     
+    report = progress or (lambda **fields: None)
+    
+    cache_path = _parse_cache_path(file_path, sha256) if sha256 else None
+    cached = cache_path is not None and cache_path.exists()
+    if cached:
+        print(f"파싱 캐시 사용: {cache_path.name}")
+        parsed_path = cache_path
+    else:
+        # xlsx/csv는 스트리밍으로 묶음 단위 파싱, xls는 파일 전체를 한 묶음으로
+        if file_path.suffix.lower() == '.xlsx':
+            batches = iter_excel_batches(file_path)
+        elif file_path.suffix.lower() == '.xls':
+            batches = [parse_excel_file(file_path)]
+        else:
+            batches = iter_csv_batches(file_path)
+        # 파싱 결과를 캐시(해시가 없으면 임시 파일)에 모두 기록한 뒤 저장 시작
+        # - 파싱하는 동안 쓰기 트랜잭션을 열어두면 같은 DB의 다른 쓰기가 잠금 대기로 실패함
+        parsed_path = cache_path or file_path.with_name(f"{file_path.name}.{uuid.uuid4().hex}.parsed.jsonl.gz")
+        _write_parse_cache(batches, parsed_path, lambda count: report(rows_parsed=count))
+    
+    # 캐시에서 바로 저장하는 경우 파싱 건수는 캐시에서 읽은 건수
+    read_progress = (lambda count: report(rows_parsed=count)) if cached else None
+    try:
+        imported_count = _save_batches(_read_parse_cache(parsed_path, progress=read_progress), progress)
+    finally:
+        if parsed_path != cache_path:
+            parsed_path.unlink(missing_ok=True)
     print(f"총 {imported_count}건 저장됨")
     return imported_count
 
 
+def import_files(file_paths, workers=PARSE_WORKERS, progress=None, hashes=None):
+    """여러 파일을 병렬 파싱 후 한 번에 DB 저장 (파일들에 포함된 월의 기존 데이터 삭제 후 저장)
+    
+    hashes(파일별 내용 해시)가 있으면 캐시가 있는 파일은 파싱하지 않고 캐시에서 읽음.
+    """
+    file_paths = [Path(path) for path in file_paths]
+    cache_paths = ([_parse_cache_path(path, sha256) for path, sha256 in zip(file_paths, hashes)]
+                   if hashes else [None] * len(file_paths))
+    
+    to_parse = [path for path, cache_path in zip(file_paths, cache_paths)
+                if not (cache_path and cache_path.exists())]
+    parsed = dict(zip(to_parse, parse_files_parallel(to_parse, workers)))
+    
+    transactions = []
+    for file_path, cache_path in zip(file_paths, cache_paths):
+        if file_path in parsed:
+            txs = parsed[file_path]
+            if cache_path:
+                _write_parse_cache([txs], cache_path)
+        else:
+            print(f"파싱 캐시 사용: {cache_path.name}")
+            txs = [tx for batch in _read_parse_cache(cache_path) for tx in batch]
+        transactions.extend(txs)
+    
+    if progress:
+        progress(rows_parsed=len(transactions))
+    imported_count = _save_batches([transactions], progress)
+    print(f"총 {len(file_paths)}개 파일, {imported_count}건 저장됨")
+    return imported_count
+
+
 if __name__ == "__main__":
     # 테스트
     import sys
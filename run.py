@@ -1,54 +1,69 @@
 """
 가계부 앱 런처
 시작 시 브라우저 자동으로 열기
+
+시작 작업은 모두 main()에서 실행 - 파싱 워커 프로세스(spawn)는 이 파일을 __mp_main__으로 다시 import하므로
+모듈 최상위에 두면 워커마다 인증 DB 초기화/사용자 DB 마이그레이션/앱 import가 반복됨.
 """
+import multiprocessing
 import webbrowser
 import threading
 import time
 import sys
 import os
 
-# EXE로 패키징된 경우를 위한 경로 설정
-if getattr(sys, 'frozen', False):
-    base_path = os.path.dirname(sys.executable)
-    os.chdir(base_path)
-else:
-    base_path = os.path.dirname(os.path.abspath(__file__))
-
-# 환경변수 로드 (.env 파일이 있으면)
-try:
-    from dotenv import load_dotenv
-    load_dotenv(os.path.join(base_path, '.env'))
-except ImportError:
-    pass  # python-dotenv가 없으면 무시
-
-# 환경변수에서 설정 읽기 (기본값 제공)
-FLASK_HOST = os.getenv('FLASK_HOST', '127.0.0.1')
-FLASK_PORT = int(os.getenv('FLASK_PORT', '5000'))
-FLASK_DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
-
-# 인증 DB 초기화
-from auth import set_auth_db_path, init_auth_db
-set_auth_db_path(base_path)
-init_auth_db()
-
-# app 모듈에 BASE_PATH 설정
-import app as flask_app
-flask_app.BASE_PATH = base_path
-
-# Flask 앱 가져오기
-from app import app
-
-def open_browser():
+
+def get_base_path():
+    """앱 기준 경로 (EXE로 패키징된 경우 실행 파일 위치로 작업 폴더 변경)"""
+    if getattr(sys, 'frozen', False):
+        base_path = os.path.dirname(sys.executable)
+        os.chdir(base_path)
+        return base_path
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def open_browser(host, port):
     """서버 시작 후 브라우저 열기"""
     time.sleep(1.5)  # 서버 시작 대기
-    webbrowser.open(f'http://{FLASK_HOST}:{FLASK_PORT}/')
+    webbrowser.open(f'http://{host}:{port}/')
 
-if __name__ == '__main__':
+
+def main():
+    base_path = get_base_path()
+    
+    # 환경변수 로드 (.env 파일이 있으면)
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(base_path, '.env'))
+    except ImportError:
+        pass  # python-dotenv가 없으면 무시
+    
+    # 환경변수에서 설정 읽기 (기본값 제공)
+    flask_host = os.getenv('FLASK_HOST', '127.0.0.1')
+    flask_port = int(os.getenv('FLASK_PORT', '5000'))
+    flask_debug = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
+    
+    # 인증 DB 초기화
+    from auth import set_auth_db_path, init_auth_db
+    set_auth_db_path(base_path)
+    init_auth_db()
+    
+    # 기존 사용자 DB 스키마 업데이트
+    import database as db
+    db.migrate_user_dbs(base_path)
+    
+    # app 모듈에 BASE_PATH 설정
+    import app as flask_app
+    flask_app.BASE_PATH = base_path
+    
     # 브라우저 열기 스레드 시작
-    threading.Thread(target=open_browser, daemon=True).start()
+    threading.Thread(target=open_browser, args=(flask_host, flask_port), daemon=True).start()
     
-    # Flask 서버 시작
-    app.run(debug=FLASK_DEBUG, host=FLASK_HOST, port=FLASK_PORT, use_reloader=False)
+    # Flask 서버 시작 (요청마다 사용자 DB 경로가 컨텍스트로 분리되므로 멀티스레드로 처리)
+    flask_app.app.run(debug=flask_debug, host=flask_host, port=flask_port, use_reloader=False, threaded=True)
 
 
+if __name__ == '__main__':
+    # EXE에서 파싱 워커 프로세스로 실행된 경우 앱을 띄우지 않고 워커로 동작
+    multiprocessing.freeze_support()
+    main()